@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import time
+
+from csv_managing import ENGINES, ExactSum, read_chunks
+from csv_managing_schema import Quarantine
+
+# Benchmark the finance_manager parsing engines: read a synthetic export
+# with each engine (parse, convert, flag bad values, sum) and check that they
+# agree on rows, total and rejected rows. Writing the workbook is left out.
+#
+#   python bench_csv_engines.py --rows 10000000 --file /tmp/bench.csv
+
+CSV_HEADER = "Series_reference,Period,Data_value,Suppressed,STATUS,UNITS,Magnitude,Series_title_1,Series_title_2\n"
+SERIES = ["Actual", "Forecast", "Seasonally adjusted", "Trend", "Total, all industries"]
+BAD_VALUES = ["..", "n/a", "12,5", "x", "-"]
+
+
+def write_synthetic_csv(path: str, rows: int, na_ratio: float = 0.02, bad_ratio: float = 0.001,
+                        seed: int = 42) -> None:
+    """Write a CSV in the layout finance_manager expects, with some 'NA' and unparseable values."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(CSV_HEADER)
+        lines = []
+        for i in range(rows):
+            r = rng.random()
+            if r < na_ratio:
+                value = "NA"
+            elif r < na_ratio + bad_ratio:
+                value = rng.choice(BAD_VALUES)
+            else:
+                value = f"{rng.lognormvariate(8, 2):.3f}"
+            series = SERIES[i % len(SERIES)]
+            if "," in value or "," in series:
+                value, series = f'"{value}"', f'"{series}"'
+            lines.append(f"BDCQ.SEA{i % 97},{2000 + i % 25}.{i % 12 + 1:02d},{value},,F,Dollars,6,{series},Industry\n")
+            if len(lines) >= 100_000:
+                f.writelines(lines)
+                lines = []
+        f.writelines(lines)
+
+
+def bench(engine: str, path: str, processes: int = 1) -> tuple[float, int, float, list]:
+    rejected = Quarantine(keep=True)
+    total = ExactSum()
+    rows = 0
+    start = time.perf_counter()
+    for periods, titles, values, chunk_total in read_chunks(path, engine, processes=processes, quarantine=rejected):
+        total.merge(chunk_total)
+        rows += len(values)
+    elapsed = time.perf_counter() - start
+    label = engine if processes == 1 else f"{engine}x{processes}"
+    print(f"{label:<10} {elapsed:8.2f}s  {rows / elapsed / 1e6:6.2f} M rows/s  total {total.value!r}")
+    return elapsed, rows, total.value, rejected.rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the finance_manager parsing engines.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows in the synthetic CSV")
+    parser.add_argument("--file", default="bench_transactions.csv", help="Synthetic CSV path (reused if it exists)")
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="Engine to run (default: all)")
+    parser.add_argument("--processes", type=int, action="append",
+                        help="Also run each engine over this many worker processes (repeatable)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        start = time.perf_counter()
+        write_synthetic_csv(args.file, args.rows)
+        print(f"Wrote {args.rows} rows to {args.file} in {time.perf_counter() - start:.1f}s")
+
+    runs = [(engine, n) for engine in args.engine or ENGINES for n in [1, *(args.processes or [])]]
+    results = {(engine, n): bench(engine, args.file, n) for engine, n in runs}
+    if len(results) > 1:
+        first, *others = results
+        base_time, *base = results[first]
+        for engine, n in others:
+            elapsed, *result = results[engine, n]
+            same = "same rows, total and rejected rows" if result == base else "MISMATCH"
+            print(f"{engine} x{n}: {base_time / elapsed:.2f}x vs {first[0]} x1 ({same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_csv_engines import write_synthetic_csv
+from csv_managing import ENGINES, finance_manager
+from csv_managing_sinks import SINKS, Sink, open_sink
+
+# End-to-end benchmark of finance_manager(): generate synthetic exports
+# (cached in --data-dir), run each (rows, engine, format) case in a fresh
+# child process per repeat (so peak RSS is per run) and write the results
+# as JSON so two runs can be diffed.
+#
+#   python bench_csv_managing.py --rows 10000 --rows 1000000 --out before.json
+#   python bench_csv_managing.py --rows 50000000 --engine numpy --format csv --tracemalloc
+#   python bench_csv_managing.py --processes 2 --rows 4000000 --rows 8000000 --check-rss 1.2
+#
+# Output-write time is the time spent inside the sink; parse time is the
+# rest (reading, converting, summing and aggregating).
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000, 50_000_000)
+EXTENSIONS = {"xlsx": ".xlsx", "csv": ".csv", "sqlite": ".db", "npz": ".npz"}
+
+
+class TimedSink(Sink):
+    """Pass everything to another sink, adding up the rows and the time spent in it."""
+
+    def __init__(self, sink: Sink):
+        super().__init__(sink.path)
+        self.sink = sink
+        self.seconds = 0.0
+        self.rows = 0
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def write_rows(self, periods, titles, values):
+        self.rows += len(values)
+        self._timed(self.sink.write_rows, periods, titles, values)
+
+    def write_total(self, total):
+        self._timed(self.sink.write_total, total)
+
+    def write_table(self, name, header, rows):
+        self._timed(self.sink.write_table, name, header, rows)
+
+    def close(self):
+        self._timed(self.sink.close)
+
+    def abort(self):
+        self.sink.abort()
+
+
+def data_file(data_dir: str, rows: int, na_ratio: float, bad_ratio: float, seed: int) -> str:
+    """Path of the synthetic CSV for these parameters, generated on first use."""
+    path = os.path.join(data_dir, f"transactions-{rows}-na{na_ratio}-bad{bad_ratio}-seed{seed}.csv")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_synthetic_csv(path + ".tmp", rows, na_ratio, bad_ratio, seed)
+        os.replace(path + ".tmp", path)
+        print(f"Generated {path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return path
+
+
+def run_once(spec: dict) -> dict:
+    """Run finance_manager() once and report timings and memory."""
+    if spec["tracemalloc"]:
+        tracemalloc.start()
+    sink = TimedSink(open_sink(spec["output"], spec["format"]))
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    # finance_manager prints the total (and rejected-row counts): keep stdout for the JSON
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        finance_manager(spec["input"], spec["output"], keep_rows=False, engine=spec["engine"],
+                        processes=spec["processes"], summary=spec["summary"], sink=sink)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    result = {
+        "wall_seconds": wall,
+        "parse_seconds": wall - sink.seconds,
+        "write_seconds": sink.seconds,
+        "rows": sink.rows,
+        "rows_per_second": sink.rows / wall if wall else None,
+        "parse_rows_per_second": sink.rows / (wall - sink.seconds) if wall > sink.seconds else None,
+        "user_seconds": after.ru_utime - before.ru_utime,
+        "sys_seconds": after.ru_stime - before.ru_stime,
+        "peak_rss_kb": after.ru_maxrss,
+        # Largest worker process, with --processes > 1
+        "peak_rss_children_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "output_bytes": os.path.getsize(spec["output"]) if os.path.exists(spec["output"]) else None,
+    }
+    if spec["tracemalloc"]:
+        result["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def _child(spec: dict) -> dict:
+    # A fresh interpreter per run keeps ru_maxrss specific to this run
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(spec)],
+                         check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out)
+
+
+def run_case(path: str, rows: int, engine: str, output_format: str, args) -> dict:
+    runs = []
+    traced = None
+    with tempfile.TemporaryDirectory(prefix="bench-csv-", dir=args.out_dir) as out_dir:
+        spec = {"input": path, "output": os.path.join(out_dir, "output" + EXTENSIONS[output_format]),
+                "format": output_format, "engine": engine, "processes": args.processes,
+                "summary": args.summary, "tracemalloc": False}
+        for _ in range(args.repeat):
+            runs.append(_child(spec))
+        if args.tracemalloc:
+            # tracemalloc slows allocations down: its own run, timings not used
+            traced = _child({**spec, "tracemalloc": True})["tracemalloc_peak_bytes"]
+
+    walls = [run["wall_seconds"] for run in runs]
+    best = min(runs, key=lambda run: run["wall_seconds"])
+    print(f"{rows:>10} {engine:<7} {output_format:<7} median {statistics.median(walls):8.2f}s  "
+          f"parse {best['parse_seconds']:7.2f}s  write {best['write_seconds']:7.2f}s  "
+          f"{best['rows_per_second'] / 1e6:6.2f} M rows/s  rss {best['peak_rss_kb'] / 1024:7.1f} MB",
+          file=sys.stderr)
+    return {
+        "wall_seconds_median": statistics.median(walls),
+        "wall_seconds_min": min(walls),
+        "parse_seconds_min": min(run["parse_seconds"] for run in runs),
+        "write_seconds_min": min(run["write_seconds"] for run in runs),
+        "rows_per_second_max": max(run["rows_per_second"] for run in runs),
+        "peak_rss_kb_max": max(run["peak_rss_kb"] for run in runs),
+        "peak_rss_children_kb_max": max(run["peak_rss_children_kb"] for run in runs),
+        "tracemalloc_peak_bytes": traced,
+        "best": best,
+        "runs": runs,
+    }
+
+
+def check_rss(cases: dict, sizes: list, engines: list, formats: list, ratio: float) -> list[str]:
+    """
+    Compare the peak RSS (of this process or its largest worker, whichever is
+    higher) of the largest and smallest input size of each engine and
+    format: memory should stay flat as the input grows. Returns a message
+    per case over 'ratio'.
+    """
+    def peak(case):
+        # A spawned worker's ru_maxrss includes what its parent held before exec
+        return max(case["peak_rss_kb_max"], case["peak_rss_children_kb_max"])
+
+    small, large = min(sizes), max(sizes)
+    failures = []
+    for engine in engines:
+        for output_format in formats:
+            before = peak(cases[f"{small}-{engine}-{output_format}"])
+            after = peak(cases[f"{large}-{engine}-{output_format}"])
+            print(f"RSS {engine:<7} {output_format:<7} {small} rows {before / 1024:7.1f} MB, "
+                  f"{large} rows {after / 1024:7.1f} MB (x{after / before:.2f})", file=sys.stderr)
+            if after > before * ratio:
+                failures.append(f"{engine}/{output_format}: peak RSS grew x{after / before:.2f} "
+                                f"from {small} to {large} rows (limit x{ratio})")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark finance_manager() on synthetic exports.")
+    parser.add_argument("--rows", type=int, action="append",
+                        help=f"Rows in the synthetic CSV (repeatable; default: 10000 100000 1000000; "
+                             f"up to {SIZES[-1]})")
+    parser.add_argument("--na-ratio", type=float, default=0.02, help="Share of 'NA' values")
+    parser.add_argument("--bad-ratio", type=float, default=0.001, help="Share of values that are not numbers")
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="Parsing engine (default: all)")
+    parser.add_argument("--format", action="append", choices=SINKS, help="Output format (default: csv)")
+    parser.add_argument("--processes", type=int, default=1, help="Passed to finance_manager")
+    parser.add_argument("--summary", action="store_true", help="Also build the summary tables")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="One more run per case to measure the tracemalloc peak")
+    parser.add_argument("--check-rss", type=float, metavar="RATIO",
+                        help="Fail if the peak RSS of the largest --rows case is more than RATIO times "
+                             "that of the smallest (needs two --rows values)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=tempfile.gettempdir(), help="Where the synthetic CSVs are kept")
+    parser.add_argument("--out-dir", default=tempfile.gettempdir(), help="Where the outputs are written")
+    parser.add_argument("--out", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_once(json.loads(args.run_one))))
+        return
+
+    sizes = args.rows or list(SIZES[:3])
+    too_big = [rows for rows in sizes if not 0 < rows <= SIZES[-1]]
+    if too_big:
+        raise SystemExit(f"--rows must be between 1 and {SIZES[-1]}")
+    if args.check_rss and len(set(sizes)) < 2:
+        raise SystemExit("--check-rss needs two different --rows values")
+    engines = args.engine or list(ENGINES)
+    formats = args.format or ["csv"]
+
+    cases = {}
+    for rows in sizes:
+        path = data_file(args.data_dir, rows, args.na_ratio, args.bad_ratio, args.seed)
+        for engine in engines:
+            for output_format in formats:
+                cases[f"{rows}-{engine}-{output_format}"] = run_case(path, rows, engine, output_format, args)
+
+    results = {
+        "meta": {
+            "na_ratio": args.na_ratio,
+            "bad_ratio": args.bad_ratio,
+            "processes": args.processes,
+            "summary": args.summary,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "cases": cases,
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.check_rss:
+        failures = check_rss(cases, sizes, engines, formats, args.check_rss)
+        if failures:
+            raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
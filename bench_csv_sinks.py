@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+import time
+
+from bench_csv_engines import write_synthetic_csv
+from csv_managing import Aggregates, ExactSum, read_chunks
+from csv_managing_sinks import SINKS, open_sink
+
+# Benchmark the finance_manager output sinks: parse a synthetic export once,
+# then time each backend writing the same rows, total and summary tables.
+#
+#   python bench_csv_sinks.py --rows 1000000 --file /tmp/bench.csv
+
+EXTENSION = {"xlsx": ".xlsx", "csv": ".csv", "sqlite": ".db", "npz": ".npz"}
+
+
+def load(path: str) -> tuple[list, float, list]:
+    """Parsed chunks, exact total and summary tables of a CSV (rejected rows are dropped)."""
+    chunks = []
+    total = ExactSum()
+    aggregates = Aggregates(pivot=True)
+    for periods, titles, values, chunk_total in read_chunks(path):
+        chunks.append((periods, titles, values))
+        total.merge(chunk_total)
+        aggregates.add_chunk(periods, titles, values)
+    return chunks, total.value, aggregates.tables()
+
+
+def bench(output_format: str, chunks: list, total: float, tables: list, out_dir: str) -> None:
+    path = os.path.join(out_dir, "output" + EXTENSION[output_format])
+    rows = sum(len(values) for _, _, values in chunks)
+    start = time.perf_counter()
+    with open_sink(path, output_format) as sink:
+        for periods, titles, values in chunks:
+            sink.write_rows(periods, titles, values)
+        sink.write_total(total)
+        for name, header, table_rows in tables:
+            sink.write_table(name, header, table_rows)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)
+               if name.startswith("output"))
+    print(f"{output_format:<7} {elapsed:8.2f}s  {rows / elapsed / 1e6:6.2f} M rows/s  {size / 1e6:8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the finance_manager output sinks.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the synthetic CSV")
+    parser.add_argument("--file", default="bench_transactions.csv", help="Synthetic CSV path (reused if it exists)")
+    parser.add_argument("--format", action="append", choices=SINKS, help="Sink to run (default: all)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        write_synthetic_csv(args.file, args.rows)
+    start = time.perf_counter()
+    chunks, total, tables = load(args.file)
+    rows = sum(len(values) for _, _, values in chunks)
+    print(f"Parsed {rows} rows in {time.perf_counter() - start:.2f}s")
+
+    for output_format in args.format or SINKS:
+        with tempfile.TemporaryDirectory() as out_dir:
+            bench(output_format, chunks, total, tables, out_dir)
+
+
+if __name__ == "__main__":
+    main()
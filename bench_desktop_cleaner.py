@@ -0,0 +1,232 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from desktop_cleaner_bot import (
+    AUDIO_EXTENSIONS,
+    DOC_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    OrganizerConfig,
+    organize,
+)
+
+# End-to-end benchmark: generate a synthetic tree, run organize() on it in a
+# fresh child process per repeat (so peak RSS is per run) and write the
+# results as JSON so two runs can be diffed.
+#
+#   python bench_desktop_cleaner.py --files 20000 --repeat 3 --out before.json
+#   python bench_desktop_cleaner.py --scenario real-collisions-nested-same
+#
+# Scenarios are the cross product of mode (dry/real), names (unique or
+# collision-heavy), layout (flat/nested) and device (same/cross). The cross
+# device ones need --cross-root on another filesystem (default /dev/shm) and
+# are reported as skipped when it is on the same device as --root.
+
+MODES = ("dry", "real")
+NAMES = ("unique", "collisions")
+LAYOUTS = ("flat", "nested")
+DEVICES = ("same", "cross")
+DEST_DIRS = ("music", "sfx", "video", "images", "docs")
+OTHER_EXTENSIONS = [".exe", ".zip", ".iso", ".tmp", ".log", ".bak", ""]
+STEMS = ["IMG_", "Screenshot ", "invoice-", "report", "track", "clip", "scan", "Untitled"]
+
+
+def scenarios(selected: list[str] | None = None) -> list[str]:
+    names = ["-".join(combo) for combo in itertools.product(MODES, NAMES, LAYOUTS, DEVICES)]
+    if selected:
+        unknown = set(selected) - set(names)
+        if unknown:
+            raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        return [name for name in names if name in selected]
+    return names
+
+
+def make_tree(root: str, files: int, collisions: bool, nested: bool,
+              max_size: int, seed: int = 42) -> int:
+    """
+    Fill root/src with 'files' files with realistic extensions and sizes.
+    Collision-heavy trees draw names from a small pool, spread them over
+    subdirectories and pre-seed the destinations with the same names (and a
+    few "(n)" variants) so every move has to probe for a free name.
+    Returns the total number of bytes written.
+    """
+    rng = random.Random(seed)
+    known = sorted(AUDIO_EXTENSIONS | IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | DOC_EXTENSIONS)
+    payload = os.urandom(max_size)
+    src = os.path.join(root, "src")
+    os.makedirs(src)
+    pool = max(files // 50, 1) if collisions else files
+    subdirs = [os.path.join(src, f"d{i // 10}", f"d{i}") for i in range(100)] if nested else [src]
+    for path in subdirs:
+        os.makedirs(path, exist_ok=True)
+
+    seen = set()
+    total = 0
+    for i in range(files):
+        ext = rng.choice(known) if rng.random() < 0.8 else rng.choice(OTHER_EXTENSIONS)
+        stem = STEMS[i % len(STEMS)]
+        name = f"{stem}{i % pool:07d}{ext}"
+        parent = subdirs[i % len(subdirs)]
+        if (parent, name) in seen:
+            # Flat trees cannot hold the same name twice; vary it instead
+            name = f"{stem}{i % pool:07d} copy {i}{ext}"
+        seen.add((parent, name))
+        size = min(int(rng.lognormvariate(9, 2)), max_size)
+        with open(os.path.join(parent, name), "wb") as f:
+            f.write(payload[:size])
+        total += size
+
+    if collisions:
+        for dest in DEST_DIRS:
+            os.makedirs(os.path.join(root, dest))
+        for i in range(pool):
+            for ext in known:
+                stem = STEMS[i % len(STEMS)]
+                dest = os.path.join(root, DEST_DIRS[i % len(DEST_DIRS)])
+                open(os.path.join(dest, f"{stem}{i:07d}{ext}"), "wb").close()
+                if i % 7 == 0:
+                    open(os.path.join(dest, f"{stem}{i:07d}(1){ext}"), "wb").close()
+    return total
+
+
+def run_once(spec: dict) -> dict:
+    """Run organize() for one prepared tree and report timings and resource usage."""
+    root, dest_root = spec["root"], spec["dest_root"]
+    cfg = OrganizerConfig(
+        source_dir=os.path.join(root, "src"),
+        dest_dir_music=os.path.join(dest_root, "music"),
+        dest_dir_sfx=os.path.join(dest_root, "sfx"),
+        dest_dir_video=os.path.join(dest_root, "video"),
+        dest_dir_image=os.path.join(dest_root, "images"),
+        dest_dir_documents=os.path.join(dest_root, "docs"),
+        dry_run=spec["mode"] == "dry",
+        recursive=spec["layout"] == "nested",
+        workers=spec["workers"],
+        fsync=spec["fsync"],
+        metrics=True,
+    )
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    summary = organize(cfg)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "wall_seconds": wall,
+        "user_seconds": after.ru_utime - before.ru_utime,
+        "sys_seconds": after.ru_stime - before.ru_stime,
+        "peak_rss_kb": after.ru_maxrss,
+        "voluntary_switches": after.ru_nvcsw - before.ru_nvcsw,
+        "files_seen": summary.files_seen,
+        "files_moved": summary.files_moved,
+        "bytes_moved": summary.bytes_moved,
+        "errors": summary.errors,
+        "phases": {name: {"count": p.count, "total_seconds": p.total_seconds,
+                          "p50_seconds": p.p50_seconds, "p99_seconds": p.p99_seconds}
+                   for name, p in summary.phases.items()},
+    }
+
+
+def run_scenario(name: str, args) -> dict:
+    mode, names, layout, device = name.split("-")
+    if device == "cross":
+        if not args.cross_root or not os.path.isdir(args.cross_root):
+            return {"skipped": "no --cross-root directory"}
+        if os.stat(args.cross_root).st_dev == os.stat(args.root).st_dev:
+            return {"skipped": f"{args.cross_root} is on the same device as {args.root}"}
+
+    runs = []
+    for repeat in range(args.repeat):
+        root = tempfile.mkdtemp(prefix="bench-src-", dir=args.root)
+        dest_root = root if device == "same" else tempfile.mkdtemp(prefix="bench-dst-", dir=args.cross_root)
+        try:
+            written = make_tree(root, args.files, names == "collisions", layout == "nested",
+                                args.max_size, seed=args.seed)
+            if dest_root != root:
+                for dest in DEST_DIRS:
+                    src_dest = os.path.join(root, dest)
+                    if os.path.isdir(src_dest):
+                        shutil.move(src_dest, os.path.join(dest_root, dest))
+            spec = {"root": root, "dest_root": dest_root, "mode": mode, "layout": layout,
+                    "workers": args.workers, "fsync": args.fsync}
+            # A fresh interpreter per run keeps ru_maxrss specific to this run
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(spec)],
+                                 check=True, stdout=subprocess.PIPE, text=True).stdout
+            result = json.loads(out)
+            result["bytes_generated"] = written
+            runs.append(result)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+            if dest_root != root:
+                shutil.rmtree(dest_root, ignore_errors=True)
+
+    walls = [run["wall_seconds"] for run in runs]
+    best = min(runs, key=lambda run: run["wall_seconds"])
+    print(f"{name:<32} median {statistics.median(walls):8.3f}s  min {min(walls):8.3f}s  "
+          f"rss {max(run['peak_rss_kb'] for run in runs) / 1024:7.1f} MB  sys {best['sys_seconds']:6.3f}s",
+          file=sys.stderr)
+    return {
+        "wall_seconds_median": statistics.median(walls),
+        "wall_seconds_min": min(walls),
+        "peak_rss_kb_max": max(run["peak_rss_kb"] for run in runs),
+        "best": best,
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark organize() on synthetic trees.")
+    parser.add_argument("--files", type=int, default=10_000, help="Number of files per tree")
+    parser.add_argument("--max-size", type=int, default=256 * 1024, help="Largest synthetic file, in bytes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (a fresh tree each time)")
+    parser.add_argument("--workers", type=int, default=1, help="Passed to OrganizerConfig.workers")
+    parser.add_argument("--fsync", default="batch", help="Passed to OrganizerConfig.fsync")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--root", default=tempfile.gettempdir(), help="Where to create the source trees")
+    parser.add_argument("--cross-root", default="/dev/shm",
+                        help="Destination root on another device for the cross-device scenarios")
+    parser.add_argument("--scenario", action="append", help="Run only this scenario (repeatable)")
+    parser.add_argument("--out", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_once(json.loads(args.run_one))))
+        return
+
+    results = {
+        "meta": {
+            "files": args.files,
+            "max_size": args.max_size,
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "fsync": args.fsync,
+            "seed": args.seed,
+            "root": args.root,
+            "cross_root": args.cross_root,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "scenarios": {name: run_scenario(name, args) for name in scenarios(args.scenario)},
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
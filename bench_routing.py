@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import time
+
+from desktop_cleaner_bot import (
+    AUDIO_EXTENSIONS,
+    DOC_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    OrganizerConfig,
+    determine_destination,
+)
+from desktop_cleaner_rules import Rule, RuleSet
+
+# Micro-benchmark: route N synthetic file names with the built-in
+# determine_destination() and with compiled RuleSets of growing size, to
+# show how the per-file cost scales with the number of rules.
+#
+#   python bench_routing.py --files 1000000
+#   python bench_routing.py --files 1000000 --rules 200 --rules 5000
+
+RULE_COUNTS = (0, 10, 100, 1000)
+
+UNKNOWN_EXTENSIONS = [".exe", ".zip", ".iso", ".dmg", ".tmp", ".log", ".bak", ""]
+
+
+def synthetic_files(n: int, seed: int = 42):
+    """Return n (name, name_lower, ext_lower, stat) tuples with realistic extensions."""
+    rng = random.Random(seed)
+    known = sorted(AUDIO_EXTENSIONS | IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | DOC_EXTENSIONS)
+    now = time.time()
+    files = []
+    for i in range(n):
+        ext = rng.choice(known) if rng.random() < 0.8 else rng.choice(UNKNOWN_EXTENSIONS)
+        stem = rng.choice(["IMG_", "Screenshot ", "invoice-", "report", "track", "clip"])
+        name = f"{stem}{i:07d}{ext.upper() if rng.random() < 0.1 else ext}"
+        size = int(rng.lognormvariate(13, 2.5))
+        mtime = now - rng.uniform(0, 365 * 24 * 3600)
+        st = os.stat_result((0o100644, i, 1, 1, 0, 0, size, mtime, mtime, mtime))
+        name_lower = name.lower()
+        files.append((name, name_lower, os.path.splitext(name_lower)[1], st))
+    return files
+
+
+def synthetic_rules(n: int, seed: int = 7) -> RuleSet:
+    """
+    Build n rules: mostly extension-keyed (with size/age/regex conditions),
+    plus a few extension-independent ones that land in the fallback list.
+    """
+    rng = random.Random(seed)
+    exts = sorted(IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | DOC_EXTENSIONS)
+    rules = []
+    for i in range(n):
+        kind = i % 10
+        dest = f"/dest/rule-{i}"
+        if kind == 0:
+            rules.append(Rule(dest=dest, regex=rf"^invoice-{rng.randint(0, 9)}"))
+        elif kind < 4:
+            rules.append(Rule(dest=dest, glob=f"screenshot*{rng.choice(exts)}"))
+        elif kind < 7:
+            rules.append(Rule(dest=dest, extensions=(rng.choice(exts),), min_size=rng.randint(10 ** 6, 10 ** 9)))
+        else:
+            rules.append(Rule(dest=dest, extensions=(rng.choice(exts),), min_age_days=rng.randint(30, 300)))
+    return RuleSet(rules)
+
+
+def bench(label: str, fn, files) -> float:
+    start = time.perf_counter()
+    for name, name_lower, ext_lower, st in files:
+        fn(name, name_lower, ext_lower, st)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f}s  {elapsed / len(files) * 1e9:8.1f} ns/file")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark file routing.")
+    parser.add_argument("--files", type=int, default=1_000_000, help="Number of synthetic names to route")
+    parser.add_argument("--rules", type=int, action="append",
+                        help=f"Number of synthetic rules to compile (repeatable; default: {RULE_COUNTS})")
+    args = parser.parse_args()
+
+    cfg = OrganizerConfig("/src", "/music", "/sfx", "/video", "/image", "/docs")
+    files = synthetic_files(args.files)
+
+    def builtin(name, name_lower, ext_lower, st):
+        return determine_destination(name_lower, ext_lower, st.st_size, cfg)
+
+    base = bench("determine_destination", builtin, files)
+    results = []
+    for count in sorted(set(args.rules or RULE_COUNTS)):
+        rules = synthetic_rules(count)
+
+        def with_rules(name, name_lower, ext_lower, st):
+            return (rules.destination(name, name_lower, ext_lower, st)
+                    or determine_destination(name_lower, ext_lower, st.st_size, cfg))
+
+        results.append((count, bench(f"RuleSet ({count} rules) + builtin", with_rules, files)))
+
+    print(f"\n{'rules':>8} {'ns/file':>9} {'vs builtin':>11} {'vs fewest rules':>16}")
+    for count, elapsed in results:
+        print(f"{count:>8} {elapsed / len(files) * 1e9:9.1f} {elapsed / base:10.2f}x "
+              f"{elapsed / results[0][1]:15.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,26 @@
+import contextlib
 import csv
-from openpyxl import Workbook
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, chain
+
+from csv_managing_schema import DEFAULT_SCHEMA, Quarantine, Schema, read_header
+from csv_managing_sinks import EXTENSIONS, SINKS, open_sink
+
+try:
+    # Optional: only the "numpy" engine needs them
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None
 
 # Save a CSV file of your transactions in the same folder
 # as this project and put the name below
@@ -7,48 +28,802 @@ from openpyxl import Workbook
 FILE = 'data.csv'
 OUTPUT_FILE = 'output.xlsx'
 
-def finance_manager(file):
-    total_sum = 0
-    transactions = []
-    workbook = Workbook()
-    sheet = workbook.active
-
-    with open(file, mode='r') as csv_file:
-        csv_reader = csv.reader(csv_file)
-        header = next(csv_reader)
-        for row in csv_reader:
-            # Get Period, Data_value, Series_title_1
-            Period = row[1]
-            Data_value = row[2]
-            Series_title_1 = row[7]
-
-            # Replace 'NA' with 0
-            if Data_value == 'NA':
-                Data_value = '0'
-
-            try:
-                Data_value = float(Data_value)
-                total_sum += Data_value
-            except ValueError:
-                print(f"Error: Unable to convert value to float: {Data_value}")
+# Streaming mode: rows go straight from the CSV to the workbook and are not
+# kept (or printed), so memory stays flat however big the file is
+STREAMING = False
+
+# Summary sheets: count, sum, min, max and mean by series and by period,
+# computed in the same pass as the rows; PIVOT adds a Period x Series sheet
+# of sums. RAW_ROWS = False leaves out the sheet of raw rows
+SUMMARY = False
+PIVOT = False
+RAW_ROWS = True
+STATS_HEADER = ['Count', 'Sum', 'Min', 'Max', 'Mean']
+
+# Rows whose value is not a number are counted, and written with the
+# reason to this CSV when it is set
+QUARANTINE_FILE = None
+
+# Parsing engines: "python" (csv module, row by row) or "numpy" (pandas
+# reads column chunks, values are converted and summed per chunk)
+ENGINES = ("python", "numpy")
+CHUNK_ROWS = 262144
+
+# Parallel parsing: worker processes (1 = parse in this process) and how
+# many byte-range shards each of them gets, so that no worker sits idle
+PROCESSES = 1
+SHARDS_PER_PROCESS = 4
+# Parsed shards waiting in memory are bounded: at most this many per worker
+# are submitted ahead of the one being consumed, and big files are cut into
+# more shards so that none holds more than MAX_SHARD_BYTES of the input
+SHARDS_IN_FLIGHT = 2
+MAX_SHARD_BYTES = 16 * 1024 * 1024
+
+# Incremental mode, for a CSV that only grows by appended rows: a state
+# file next to the output remembers how far the last run got, and the next
+# run only reads (and writes) what was appended since
+INCREMENTAL = False
+STATE_VERSION = 1
+# Bytes hashed at each end of the already processed part of the CSV
+FINGERPRINT_BYTES = 65536
+
+
+class ExactSum:
+    """
+    Running sum of floats without rounding error, in constant memory.
+
+    Keeps Shewchuk's non-overlapping partials (the algorithm behind
+    math.fsum), so the result is the correctly rounded sum whatever the
+    order or the number of values, and two sums can be merged exactly.
+    """
+
+    __slots__ = ("partials", "special")
+
+    def __init__(self):
+        self.partials = []
+        # inf/nan are kept apart, as the partials only work for finite values
+        self.special = 0.0
+
+    def add(self, x):
+        if not math.isfinite(x):
+            self.special += x
+            return
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        if math.isinf(x):
+            # The running sum overflowed: the total is infinite from here on
+            del partials[i:]
+            self.special += x
+            return
+        partials[i:] = [x]
+
+    @classmethod
+    def of(cls, values):
+        """
+        ExactSum of a list of floats in a few math.fsum passes instead of
+        one add() per value: the fsum of the values, then the fsum of what
+        that missed, and so on until nothing is left (usually one or two
+        passes). Falls back to add() on inf, nan or overflow.
+        """
+        total = cls()
+        parts = []
+        try:
+            while True:
+                part = math.fsum(chain(values, [-p for p in parts]))
+                if not part:
+                    break
+                if not math.isfinite(part):
+                    raise OverflowError
+                parts.append(part)
+        except (OverflowError, ValueError):
+            for x in values:
+                total.add(x)
+            return total
+        for part in parts:
+            total.add(part)
+        return total
+
+    def merge(self, other):
+        for x in other.partials:
+            self.add(x)
+        self.special += other.special
+
+    def to_state(self):
+        # JSON-friendly; floats round-trip exactly through json
+        return [self.partials, self.special]
+
+    @classmethod
+    def from_state(cls, state):
+        total = cls()
+        total.partials, total.special = list(state[0]), state[1]
+        return total
+
+    @property
+    def value(self):
+        if self.special:
+            return self.special
+        return math.fsum(self.partials)
+
+
+class GroupStats:
+    """Count, exact sum, min and max of the values of one group."""
+
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = ExactSum()
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add_values(self, values):
+        total = ExactSum.of(values)
+        self.count += len(values)
+        self.total.merge(total)
+        if math.isnan(total.special):
+            # min()/max() depend on the order when there are nans: skip them
+            values = [x for x in values if not math.isnan(x)]
+            if not values:
+                return
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+
+    @property
+    def mean(self):
+        return self.total.value / self.count if self.count else None
+
+    def row(self):
+        if not self.count:
+            return [0, 0.0, None, None, None]
+        if self.min > self.max:
+            # Only nans so far
+            return [self.count, self.total.value, None, None, self.mean]
+        return [self.count, self.total.value, self.min, self.max, self.mean]
+
+    def to_state(self):
+        return [self.count, self.total.to_state(), self.min, self.max]
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.count, total, stats.min, stats.max = state
+        stats.total = ExactSum.from_state(total)
+        return stats
+
+
+class Aggregates:
+    """
+    Group-by of the transactions on Series_title_1 and on Period (and, with
+    pivot=True, on both), fed chunk by chunk in the same pass that writes
+    the rows. Each chunk is split into per-group value lists with a dict,
+    then each list is folded into its group's GroupStats, so memory depends
+    on the number of groups, not rows.
+    """
+
+    def __init__(self, pivot=False):
+        self.overall = GroupStats()
+        self.by_series = defaultdict(GroupStats)
+        self.by_period = defaultdict(GroupStats)
+        self.pivot = defaultdict(GroupStats) if pivot else None
+
+    def add_chunk(self, periods, titles, values):
+        if not len(values):
+            return
+        self.overall.add_values(values)
+        _fold(self.by_series, titles, values)
+        _fold(self.by_period, periods, values)
+        if self.pivot is not None:
+            _fold(self.pivot, zip(periods, titles), values)
+
+    def to_state(self):
+        return {
+            'overall': self.overall.to_state(),
+            'by_series': {key: stats.to_state() for key, stats in self.by_series.items()},
+            'by_period': {key: stats.to_state() for key, stats in self.by_period.items()},
+            'pivot': None if self.pivot is None else
+            [[period, title, stats.to_state()] for (period, title), stats in self.pivot.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        aggregates = cls(pivot=state['pivot'] is not None)
+        aggregates.overall = GroupStats.from_state(state['overall'])
+        for groups, saved in ((aggregates.by_series, state['by_series']), (aggregates.by_period, state['by_period'])):
+            for key, stats in saved.items():
+                groups[key] = GroupStats.from_state(stats)
+        for period, title, stats in state['pivot'] or ():
+            aggregates.pivot[period, title] = GroupStats.from_state(stats)
+        return aggregates
+
+    def tables(self):
+        """The summary tables as (name, header, rows), for a Sink."""
+        tables = []
+        for name, label, groups in (('By series', 'Series_title_1', self.by_series),
+                                    ('By period', 'Period', self.by_period)):
+            rows = [[key] + groups[key].row() for key in sorted(groups)]
+            rows.append(['Total'] + self.overall.row())
+            tables.append((name, [label] + STATS_HEADER, rows))
+
+        if self.pivot is not None:
+            series = sorted(self.by_series)
+            rows = []
+            for period in sorted(self.by_period):
+                cells = [self.pivot[period, title].total.value if (period, title) in self.pivot else None
+                         for title in series]
+                rows.append([period] + cells + [self.by_period[period].total.value])
+            rows.append(['Total'] + [self.by_series[title].total.value for title in series]
+                        + [self.overall.total.value])
+            tables.append(('Pivot', ['Period'] + series + ['Total'], rows))
+        return tables
+
+
+def _fold(groups, keys, values):
+    chunk = defaultdict(list)
+    for key, value in zip(keys, values):
+        chunk[key].append(value)
+    for key, group_values in chunk.items():
+        groups[key].add_values(group_values)
+
+
+def iter_transactions(csv_file, schema=DEFAULT_SCHEMA, quarantine=None):
+    """
+    Yield (Period, Series_title_1, Data_value) for each row of an open CSV
+    file, skipping the header, with the columns found by 'schema'. 'NA'
+    counts as 0; rows whose value is not a number are skipped and handed
+    to 'quarantine' (a Quarantine), if any.
+    """
+    csv_reader = csv.reader(csv_file)
+    header = next(csv_reader, None)
+    if header is None:
+        return
+    extract = schema.extractor(header)
+    na_values = schema.na_values
+    convert = schema.convert
+    for row in csv_reader:
+        # Blank lines are not rows (pandas skips them too)
+        if not row:
+            continue
+        Period, Series_title_1, Data_value = extract(row)
+
+        # Replace 'NA' with 0
+        if Data_value in na_values:
+            Data_value = '0'
+
+        try:
+            value = convert(Data_value)
+        except ValueError:
+            if quarantine is not None:
+                quarantine.add('bad_value' if Data_value else 'empty_value', Period, Series_title_1, Data_value)
+            continue
+
+        yield (Period, Series_title_1, value)
+
+
+def _open_text(file):
+    # A path, or an already open text file (a shard, see _parse_shard)
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, mode='r', newline='')
+    return contextlib.nullcontext(file)
+
+
+def _python_chunks(file, chunk_rows, schema, quarantine):
+    with _open_text(file) as csv_file:
+        periods, titles, values = [], [], []
+        total = ExactSum()
+        for Period, Series_title_1, Data_value in iter_transactions(csv_file, schema, quarantine):
+            periods.append(Period)
+            titles.append(Series_title_1)
+            values.append(Data_value)
+            total.add(Data_value)
+            if len(values) >= chunk_rows:
+                yield periods, titles, values, total
+                periods, titles, values = [], [], []
+                total = ExactSum()
+        if values:
+            yield periods, titles, values, total
+
+
+def _numpy_chunks(file, chunk_rows, columns, schema, quarantine):
+    # Raw strings for the three columns, so values convert exactly as float() does
+    reader = pd.read_csv(file, usecols=list(columns), dtype=str, keep_default_na=False,
+                         na_filter=False, chunksize=chunk_rows)
+    # usecols keeps file order: find each column's place in the frame
+    period_at, title_at, value_at = (sorted(columns).index(c) for c in columns)
+    for frame in reader:
+        periods = frame.iloc[:, period_at].to_numpy()
+        raw = frame.iloc[:, value_at].to_numpy()
+        titles = frame.iloc[:, title_at].to_numpy()
+
+        # Replace 'NA' with 0
+        na = np.zeros(len(raw), dtype=bool)
+        for na_value in schema.na_values:
+            na |= raw == na_value
+        raw = np.where(na, '0', raw)
+
+        ok = _parseable(raw)
+        try:
+            values = raw[ok].astype(np.float64)
+        except ValueError:
+            # to_numeric took something float() does not; check every value
+            ok = np.fromiter((_is_float(v) for v in raw), dtype=bool, count=len(raw))
+            values = raw[ok].astype(np.float64)
+        if not ok.all():
+            if quarantine is not None:
+                for i in np.flatnonzero(~ok):
+                    quarantine.add('bad_value' if raw[i] else 'empty_value', periods[i], titles[i], raw[i])
+            periods, titles = periods[ok], titles[ok]
+
+        values = values.tolist()
+        yield periods, titles, values, ExactSum.of(values)
+
+
+def _parseable(raw):
+    """
+    Mask of the strings in 'raw' that float() accepts. to_numeric sorts them
+    in one vectorized pass; only what it rejects (bad values, but also
+    'nan', '1_000', ...) is checked again with float().
+    """
+    coerced = pd.to_numeric(pd.Series(raw), errors='coerce').to_numpy()
+    ok = np.ones(len(raw), dtype=bool)
+    for i in np.flatnonzero(np.isnan(coerced)):
+        ok[i] = _is_float(raw[i])
+    return ok
+
+
+def _is_float(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def read_chunks(file, engine="python", chunk_rows=CHUNK_ROWS, processes=1, start=0, end=None,
+                schema=DEFAULT_SCHEMA, quarantine=None):
+    """
+    Yield (periods, series_titles, values, total) chunks of the valid
+    transactions of a CSV file, where total is the chunk's ExactSum. The
+    columns are found by name with 'schema'; rejected rows go to
+    'quarantine' (a Quarantine), if any. Both engines keep the same rows,
+    reject the same ones and produce the same totals. With processes > 1
+    the file is parsed in byte-range shards by a pool of worker processes;
+    chunks and rejected rows still come in file order.
+    start and end limit the read to the records in those bytes (start must
+    be the beginning of a record, e.g. the end of an earlier read).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
+    if engine == "numpy":
+        if np is None:
+            raise RuntimeError("The numpy engine needs numpy and pandas (pip install numpy pandas)")
+        if schema.convert is not float:
+            raise ValueError("The numpy engine only converts values with float()")
+    header = read_header(file)
+    if not header:
+        return iter(())
+    # Check the header now rather than in the first chunk (or worker)
+    columns = schema.resolve(header)
+    if processes > 1:
+        return _parallel_chunks(file, engine, chunk_rows, processes, start, end, schema, quarantine)
+    if start or end is not None:
+        return _range_chunks(file, engine, chunk_rows, start, end, columns, schema, quarantine)
+    if engine == "python":
+        return _python_chunks(file, chunk_rows, schema, quarantine)
+    return _numpy_chunks(file, chunk_rows, columns, schema, quarantine)
+
+
+class _RecordRange(io.RawIOBase):
+    """Read-only file over the header line of a CSV followed by its bytes start..end."""
+
+    def __init__(self, file, header_end, start, end):
+        super().__init__()
+        self._file = open(file, 'rb')
+        self._header = self._file.read(header_end)
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        n = min(len(buffer), self._left)
+        if n <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:n])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _range_source(file, header_end, start, end, engine):
+    source = io.BufferedReader(_RecordRange(file, header_end, start, end))
+    if engine == "python":
+        return io.TextIOWrapper(source, newline='')
+    return source
+
+
+def _range_chunks(file, engine, chunk_rows, start, end, columns, schema, quarantine):
+    header_end = header_length(file)
+    start = max(start, header_end)
+    end = os.path.getsize(file) if end is None else end
+    if start >= end:
+        return
+    with _range_source(file, header_end, start, end, engine) as source:
+        if engine == "python":
+            yield from _python_chunks(source, chunk_rows, schema, quarantine)
+        else:
+            yield from _numpy_chunks(source, chunk_rows, columns, schema, quarantine)
+
+
+def _count_quotes(buf, start, end, block=1 << 24):
+    # mmap has find() but no count(): count slice by slice, dropping each
+    # slice's pages from this process once counted (they stay in the page
+    # cache), so scanning a big file does not grow the RSS with it
+    quotes = 0
+    for i in range(start, end, block):
+        stop = min(i + block, end)
+        quotes += buf[i:stop].count(b'"')
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            page = i - i % mmap.PAGESIZE
+            buf.madvise(mmap.MADV_DONTNEED, page, stop - page)
+    return quotes
+
+
+def _next_record(buf, pos, quotes):
+    """
+    Offset of the first record that starts after pos, given the number of
+    '"' in buf[:pos], and that count at the returned offset. A newline only
+    ends a record when the quotes before it are balanced, so one inside a
+    quoted field is never taken for a record boundary.
+    """
+    while True:
+        newline = buf.find(b'\n', pos)
+        if newline < 0:
+            return len(buf), quotes + _count_quotes(buf, pos, len(buf))
+        quotes += _count_quotes(buf, pos, newline)
+        pos = newline + 1
+        if quotes % 2 == 0:
+            return pos, quotes
+
+
+def header_length(file):
+    """Length in bytes of the header record of a CSV file."""
+    if os.path.getsize(file) == 0:
+        return 0
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return _next_record(buf, 0, 0)[0]
+
+
+def shard_ranges(file, shards, start=0, end=None):
+    """
+    Split a CSV file (or its records in bytes start..end, start being the
+    beginning of a record) into at most 'shards' (start, end) byte ranges
+    of about the same size, each made of whole records. Returns the ranges
+    and the length of the header line, which is left out of them.
+    """
+    if os.path.getsize(file) == 0:
+        return [], 0
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        header_end = _next_record(buf, 0, 0)[0]
+        size = len(buf) if end is None else min(end, len(buf))
+        first = pos = max(start, header_end)
+        # Quotes are balanced at a record boundary: count from there
+        quotes = 0
+        bounds = [first]
+        for k in range(1, shards):
+            target = first + (size - first) * k // shards
+            if target <= bounds[-1]:
                 continue
+            quotes += _count_quotes(buf, pos, target)
+            pos, quotes = _next_record(buf, target, quotes)
+            if pos >= size:
+                break
+            bounds.append(pos)
+        bounds.append(size)
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+    return ranges, header_end
+
+
+def _pack_strings(strings):
+    # Periods and series titles repeat a lot: send each distinct string once
+    # (one UTF-8 blob plus lengths) and an array of indexes into them, which
+    # is far smaller and quicker to move between processes than a pickled
+    # list of str objects
+    index = {}
+    codes = array('I', [index.setdefault(s, len(index)) for s in strings])
+    return ''.join(index).encode('utf-8'), array('q', map(len, index)).tobytes(), codes.tobytes()
+
+
+def _unpack_strings(blob, lengths, codes):
+    text = blob.decode('utf-8')
+    ends = array('q')
+    ends.frombytes(lengths)
+    distinct = [text[start:end] for start, end in zip(chain([0], accumulate(ends)), accumulate(ends))]
+    indexes = array('I')
+    indexes.frombytes(codes)
+    return list(map(distinct.__getitem__, indexes))
+
 
-            transaction = (Period, Series_title_1, Data_value)
-            transactions.append(transaction)
+def _floats(buf):
+    values = array('d')
+    values.frombytes(buf)
+    return values.tolist()
 
-    # Write transactions to the Excel sheet
-    sheet.append(['Period', 'Series_title_1', 'Data_value'])
-    for transaction in transactions:
-        sheet.append(transaction)
 
-    # Add total sum at the end
-    sheet.append(['Total Sum', '', total_sum])
+def _parse_shard(file, start, end, engine, chunk_rows, schema):
+    """
+    Parse bytes start..end of a CSV file (whole records, see shard_ranges)
+    in a worker process. Returns the valid rows and the shard's ExactSum
+    as flat buffers, and the rejected rows.
+    """
+    periods, titles, values = [], [], array('d')
+    total = ExactSum()
+    # Rejected rows are handed to the parent's Quarantine, in file order
+    rejected = Quarantine(keep=True)
+    for chunk_periods, chunk_titles, chunk_values, chunk_total in read_chunks(
+            file, engine, chunk_rows, start=start, end=end, schema=schema, quarantine=rejected):
+        periods.extend(chunk_periods)
+        titles.extend(chunk_titles)
+        values.extend(chunk_values)
+        total.merge(chunk_total)
+    return (_pack_strings(periods), _pack_strings(titles), values.tobytes(),
+            array('d', total.partials).tobytes(), total.special, rejected.rows)
 
-    # Save the workbook as an Excel file
-    workbook.save(OUTPUT_FILE)
 
-    print(f"The sum of your transactions this month is {total_sum}")
+def _parallel_chunks(file, engine, chunk_rows, processes, start, end, schema, quarantine):
+    size = (os.path.getsize(file) if end is None else end) - start
+    shards = max(processes * SHARDS_PER_PROCESS, -(-size // MAX_SHARD_BYTES))
+    ranges = shard_ranges(file, shards, start, end)[0]
+    if not ranges:
+        return
+    workers = min(processes, len(ranges))
+    # spawn: workers start from a clean interpreter, as in desktop_cleaner_batch
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    with pool:
+        # Shards are submitted through a window of workers * SHARDS_IN_FLIGHT
+        # and consumed in shard order, so memory stays bounded and rows,
+        # rejected rows and the merged total come out exactly as a
+        # sequential read
+        pending = deque()
+        for shard_start, shard_end in ranges:
+            pending.append(pool.submit(_parse_shard, file, shard_start, shard_end, engine, chunk_rows, schema))
+            if len(pending) < workers * SHARDS_IN_FLIGHT:
+                continue
+            yield _shard_chunk(pending.popleft().result(), quarantine)
+        while pending:
+            yield _shard_chunk(pending.popleft().result(), quarantine)
+
+
+def _shard_chunk(shard, quarantine):
+    # Unpack a _parse_shard() result into a chunk, passing its rejected rows on
+    periods, titles, value_bytes, partials, special, rejected = shard
+    if quarantine is not None:
+        for row in rejected:
+            quarantine.add(*row)
+    total = ExactSum()
+    total.partials = _floats(partials)
+    total.special = special
+    return _unpack_strings(*periods), _unpack_strings(*titles), _floats(value_bytes), total
+
+
+def state_path(output_file):
+    return output_file + '.state.json'
+
+
+def _fingerprint(file, offset):
+    """
+    Hash of the first 'offset' bytes of a file, sampled: their length and
+    the FINGERPRINT_BYTES at each end, so that checking it does not mean
+    reading the whole file again. It catches a truncated or rewritten file
+    and changed headers or last rows, not an edit in the middle.
+    """
+    digest = hashlib.sha256(str(offset).encode())
+    with open(file, 'rb') as f:
+        digest.update(f.read(min(offset, FINGERPRINT_BYTES)))
+        f.seek(max(offset - FINGERPRINT_BYTES, 0))
+        digest.update(f.read(offset - f.tell()))
+    return digest.hexdigest()
+
+
+def _ends_record(file, start, end):
+    """True if bytes start..end of a CSV (start being a record boundary) end with a whole record."""
+    if end == 0:
+        return True
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return buf[end - 1:end] == b'\n' and _count_quotes(buf, start, end) % 2 == 0
+
+
+def _load_state(file, path, expected):
+    """The state saved by the last incremental run, or None (and why) if it cannot be resumed."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Incremental: cannot read {path} ({e}), rebuilding")
+        return None
+    for key, value in expected.items():
+        if state.get(key) != value:
+            print(f"Incremental: {key} changed since the last run, rebuilding")
+            return None
+    offset = state['offset']
+    if offset is None:
+        print("Incremental: the last run ended inside a record, rebuilding")
+        return None
+    if os.path.getsize(file) < offset or _fingerprint(file, offset) != state['fingerprint']:
+        print(f"Incremental: {file} was rewritten or truncated, rebuilding")
+        return None
+    return state
+
+
+def _save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def finance_manager(file, output_file=OUTPUT_FILE, keep_rows=True, engine="python", processes=1,
+                    summary=False, pivot=False, raw_rows=True, output_format=None, incremental=False,
+                    schema=DEFAULT_SCHEMA, quarantine_file=QUARANTINE_FILE, sink=None):
+    """
+    Read the transactions of a CSV file, write them with their total to
+    output_file and print the total. Rows are streamed to the output while
+    the total is summed exactly, so with keep_rows=False memory does not
+    grow with the file and the total is returned; with keep_rows=True the
+    list of transactions is returned as well.
+    engine picks the parser (see ENGINES); processes > 1 parses the file
+    in parallel shards, with the same rows and total as a sequential read.
+    summary adds "By series" and "By period" tables (and pivot a "Pivot"
+    table), computed in the same pass; raw_rows=False leaves out the raw
+    rows, for a summary-only output.
+    output_format picks the writer (see csv_managing_sinks.SINKS: xlsx,
+    csv, sqlite or npz); by default it follows output_file's extension.
+    A Sink passed as 'sink' is written to (and closed) instead.
+    incremental=True keeps the running total and tables in a state file
+    (see state_path) and only reads the rows appended since the last run;
+    the raw rows are appended to the output, which needs a csv or sqlite
+    output. If the processed part of the file has changed, or the state
+    does not match the options, everything is rebuilt. keep_rows then
+    returns the rows read by this run only.
+    schema (a csv_managing_schema.Schema) says which columns to read.
+    Rejected rows are counted by reason, and written to quarantine_file
+    when it is given; only the counts are printed.
+    """
+    if not raw_rows and not (summary or pivot):
+        raise ValueError("Nothing to write: enable raw_rows, summary or pivot")
+    total_sum = ExactSum()
+    transactions = [] if keep_rows else None
+    aggregates = Aggregates(pivot) if summary or pivot else None
+    start = end = None
+
+    with sink if sink is not None else open_sink(output_file, output_format) as sink:
+        if incremental:
+            if raw_rows and not sink.appendable:
+                raise ValueError(f"Incremental mode cannot append rows to a {type(sink).__name__} "
+                                 f"output: use csv or sqlite, or leave out the raw rows")
+            expected = {'version': STATE_VERSION, 'input': os.path.abspath(file), 'sink': type(sink).__name__,
+                        'raw_rows': raw_rows, 'summary': summary, 'pivot': pivot,
+                        'schema': schema.describe(), 'quarantine': quarantine_file}
+            state = _load_state(file, state_path(output_file), expected)
+            if state is not None and raw_rows:
+                try:
+                    sink.resume(state['checkpoint'])
+                except ValueError as e:
+                    print(f"Incremental: {e}, rebuilding")
+                    state = None
+            start, end = 0, os.path.getsize(file)
+            if state is not None:
+                start = state['offset']
+                total_sum = ExactSum.from_state(state['total'])
+                if aggregates is not None:
+                    aggregates = Aggregates.from_state(state['aggregates'])
+                print(f"Incremental: reading {end - start} new bytes of {file}")
+
+        # A resumed run adds its rejected rows to the earlier ones
+        with Quarantine(quarantine_file, append=bool(start)) as quarantine:
+            for periods, titles, values, total in read_chunks(file, engine, processes=processes,
+                                                              start=start or 0, end=end,
+                                                              schema=schema, quarantine=quarantine):
+                total_sum.merge(total)
+                if aggregates is not None:
+                    aggregates.add_chunk(periods, titles, values)
+                if raw_rows:
+                    sink.write_rows(periods, titles, values)
+                if keep_rows:
+                    transactions.extend(zip(periods, titles, values))
+
+        # Add total sum at the end
+        total = total_sum.value
+        if raw_rows:
+            sink.write_total(total)
+        if aggregates is not None:
+            for name, header, rows in aggregates.tables():
+                sink.write_table(name, header, rows)
+
+    if incremental:
+        # A run that stopped inside a record (no newline at the end yet)
+        # cannot be resumed from: the next one rebuilds
+        offset = end if _ends_record(file, start, end) else None
+        _save_state(state_path(output_file), {
+            **expected,
+            'offset': offset,
+            'fingerprint': _fingerprint(file, end),
+            'total': total_sum.to_state(),
+            'aggregates': aggregates.to_state() if aggregates is not None else None,
+            'checkpoint': sink.checkpoint(),
+        })
+
+    if quarantine.count:
+        print(quarantine.summary())
+    print(f"The sum of your transactions this month is {total}")
     print('')
-    return transactions
+    return transactions if keep_rows else total
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Total a CSV of transactions and write them out.")
+    parser.add_argument("file", nargs="?", default=FILE, help=f"CSV of transactions (default: {FILE})")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE,
+                        help=f"Output file; its extension ({', '.join(EXTENSIONS)}) picks the format "
+                             f"unless --format is given (default: {OUTPUT_FILE})")
+    parser.add_argument("--format", choices=SINKS, default=None, help="Output format")
+    parser.add_argument("--engine", choices=ENGINES, default="python", help="CSV parsing engine")
+    parser.add_argument("--processes", type=int, default=PROCESSES, help="Worker processes for parsing")
+    parser.add_argument("--summary", action="store_true", default=SUMMARY,
+                        help="Add count/sum/min/max/mean tables by series and by period")
+    parser.add_argument("--pivot", action="store_true", default=PIVOT, help="Add a Period x Series table of sums")
+    parser.add_argument("--no-raw-rows", dest="raw_rows", action="store_false", default=RAW_ROWS,
+                        help="Leave out the raw rows (summary only)")
+    parser.add_argument("--streaming", action="store_true", default=STREAMING,
+                        help="Do not keep or print the rows")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                        help="Only read rows appended since the last --incremental run")
+    parser.add_argument("--quarantine", metavar="FILE", default=QUARANTINE_FILE,
+                        help="Write rejected rows, with the reason, to this CSV")
+    parser.add_argument("--period-column", action="append", metavar="NAME",
+                        help=f"Header name of the Period column (default: {', '.join(DEFAULT_SCHEMA.period)})")
+    parser.add_argument("--series-column", action="append", metavar="NAME",
+                        help=f"Header name of the Series_title_1 column "
+                             f"(default: {', '.join(DEFAULT_SCHEMA.series)})")
+    parser.add_argument("--value-column", action="append", metavar="NAME",
+                        help=f"Header name of the Data_value column (default: {', '.join(DEFAULT_SCHEMA.value)})")
+    parser.add_argument("--na-value", action="append", metavar="TEXT",
+                        help="Value that counts as 0 (default: NA)")
+    args = parser.parse_args()
+
+    schema = Schema(period=args.period_column or DEFAULT_SCHEMA.period,
+                    series=args.series_column or DEFAULT_SCHEMA.series,
+                    value=args.value_column or DEFAULT_SCHEMA.value,
+                    na_values=args.na_value or DEFAULT_SCHEMA.na_values)
+
+    result = finance_manager(args.file, args.output, keep_rows=not args.streaming, engine=args.engine,
+                             processes=args.processes, summary=args.summary, pivot=args.pivot,
+                             raw_rows=args.raw_rows, output_format=args.format,
+                             incremental=args.incremental, schema=schema, quarantine_file=args.quarantine)
+    if not args.streaming:
+        print(result)
+
 
-print(finance_manager(FILE))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import csv
+import os
+from collections import Counter
+from operator import itemgetter
+
+from csv_managing_sinks import HEADER
+
+# Why a row was rejected: its value is empty (or the row is too short to
+# have one), or the value converter refused it
+REJECT_REASONS = ('empty_value', 'bad_value')
+
+
+class Schema:
+    """
+    Where the Period, Series_title_1 and Data_value columns are in an
+    export. Each is looked up in the header by name, trying the given names
+    in order (case and surrounding spaces are ignored), so the same code
+    reads several export layouts. Values in na_values count as 0; the rest
+    go through 'convert' (float by default).
+    """
+
+    def __init__(self, period=('Period', 'Date'), series=('Series_title_1', 'Description', 'Category'),
+                 value=('Data_value', 'Amount', 'Value'), na_values=('NA',), convert=float):
+        self.period = tuple(period)
+        self.series = tuple(series)
+        self.value = tuple(value)
+        self.na_values = frozenset(na_values)
+        self.convert = convert
+
+    def resolve(self, header):
+        """Indexes of the (Period, Series_title_1, Data_value) columns in a header row."""
+        positions = {}
+        for i, name in enumerate(header):
+            positions.setdefault(name.strip().lower(), i)
+        columns = []
+        for field, names in zip(HEADER, (self.period, self.series, self.value)):
+            for name in names:
+                if name.strip().lower() in positions:
+                    columns.append(positions[name.strip().lower()])
+                    break
+            else:
+                raise ValueError(f"No {field} column in the header (looked for {', '.join(names)}; "
+                                 f"found {', '.join(header)})")
+        return tuple(columns)
+
+    def extractor(self, header):
+        """
+        Compile a function row -> (Period, Series_title_1, raw Data_value)
+        for files with this header. Rows too short for a column read it as
+        empty, as pandas does.
+        """
+        columns = self.resolve(header)
+        get_fields = itemgetter(*columns)
+        width = max(columns) + 1
+
+        def extract(row):
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            return get_fields(row)
+        return extract
+
+    def describe(self):
+        # What the incremental state compares to tell whether the schema changed
+        return {'period': list(self.period), 'series': list(self.series), 'value': list(self.value),
+                'na_values': sorted(self.na_values), 'convert': getattr(self.convert, '__name__', repr(self.convert))}
+
+
+DEFAULT_SCHEMA = Schema()
+
+
+def read_header(file):
+    """The header row of a CSV file ([] if the file is empty)."""
+    with open(file, mode='r', newline='') as csv_file:
+        return next(csv.reader(csv_file), [])
+
+
+class Quarantine:
+    """
+    Rows rejected while reading, counted by reason and, when path is given,
+    streamed to a CSV (reason code, then the three fields as read) instead
+    of being printed one by one. keep=True also keeps them in 'rows'.
+    """
+
+    def __init__(self, path=None, keep=False, append=False):
+        self.path = path
+        self.counts = Counter()
+        self.rows = [] if keep else None
+        self.file = self.writer = None
+        if path is not None:
+            exists = append and os.path.exists(path)
+            self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            if not exists:
+                self.writer.writerow(['Reason'] + HEADER)
+
+    def add(self, reason, period, title, value):
+        self.counts[reason] += 1
+        if self.writer is not None:
+            self.writer.writerow([reason, period, title, value])
+        if self.rows is not None:
+            self.rows.append((reason, period, title, value))
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def summary(self):
+        reasons = ', '.join(f"{reason} {n}" for reason, n in sorted(self.counts.items()))
+        where = f" (written to {self.path})" if self.path is not None else ''
+        return f"Rejected {self.count} rows: {reasons}{where}"
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
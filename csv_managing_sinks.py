@@ -0,0 +1,319 @@
+import csv
+import os
+import sqlite3
+from array import array
+from itertools import islice
+
+from openpyxl import Workbook
+
+try:
+    # Optional: only the npz sink needs it
+    import numpy as np
+except ImportError:
+    np = None
+
+HEADER = ['Period', 'Series_title_1', 'Data_value']
+
+# Rows per executemany() batch in the SQLite sink
+SQLITE_BATCH = 50000
+
+
+def table_id(name):
+    # 'By series' -> 'by_series': a summary table's file or SQL table name
+    return name.lower().replace(' ', '_')
+
+
+class Sink:
+    """
+    Where finance_manager writes its output. Rows arrive chunk by chunk as
+    parallel columns, then the grand total, then any summary tables as
+    (name, header, rows). close() finishes the output; abort() is called
+    instead when the run failed. Sinks are context managers.
+
+    Appendable sinks can add rows to the output of an earlier run:
+    checkpoint() (after close) describes the output, and resume() with that
+    description, before any write, reopens it for appending. resume()
+    raises ValueError if the output no longer matches.
+    """
+
+    appendable = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def resume(self, checkpoint):
+        raise ValueError(f"{type(self).__name__} cannot append to an earlier output")
+
+    def checkpoint(self):
+        return {}
+
+    def write_rows(self, periods, titles, values):
+        raise NotImplementedError
+
+    def write_total(self, total):
+        raise NotImplementedError
+
+    def write_table(self, name, header, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class XlsxSink(Sink):
+    """
+    Write-only openpyxl workbook: the rows sheet, then one sheet per table.
+    Cells are serialized as they are appended, so memory stays flat, but
+    the XML is slow to produce for millions of cells.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+
+    def _rows_sheet(self):
+        if self.sheet is None:
+            self.sheet = self.workbook.create_sheet()
+            self.sheet.append(HEADER)
+        return self.sheet
+
+    def write_rows(self, periods, titles, values):
+        sheet = self._rows_sheet()
+        for row in zip(periods, titles, values):
+            sheet.append(row)
+
+    def write_total(self, total):
+        self._rows_sheet().append(['Total Sum', '', total])
+
+    def write_table(self, name, header, rows):
+        sheet = self.workbook.create_sheet(name)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+
+    def close(self):
+        # Save the workbook as an Excel file
+        self.workbook.save(self.path)
+
+    def abort(self):
+        pass
+
+
+class CsvSink(Sink):
+    """
+    Plain CSV: the rows (and the 'Total Sum' line) go to path, each table to
+    <path stem>_<table>.csv next to it. Floats are written with repr(), so
+    they read back exactly.
+    """
+
+    appendable = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = None
+        self.writer = None
+        # Output size before the 'Total Sum' line
+        self.rows_end = None
+
+    def resume(self, checkpoint):
+        rows_end = checkpoint['rows_end']
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < rows_end:
+            raise ValueError(f"{self.path} is missing or shorter than when it was written")
+        # Drop the old 'Total Sum' line; new rows go after the old ones
+        os.truncate(self.path, rows_end)
+        self.file = open(self.path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+
+    def checkpoint(self):
+        return {'rows_end': self.rows_end}
+
+    def _rows_writer(self):
+        if self.writer is None:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(HEADER)
+        return self.writer
+
+    def write_rows(self, periods, titles, values):
+        self._rows_writer().writerows(zip(periods, titles, values))
+
+    def write_total(self, total):
+        writer = self._rows_writer()
+        self.file.flush()
+        self.rows_end = self.file.buffer.tell()
+        writer.writerow(['Total Sum', '', total])
+
+    def write_table(self, name, header, rows):
+        stem = os.path.splitext(self.path)[0]
+        with open(f"{stem}_{table_id(name)}.csv", 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class SqliteSink(Sink):
+    """
+    SQLite database: rows in a 'transactions' table, the total in
+    'total_sum', each summary in its own table. Everything is inserted
+    with batched executemany() in one transaction, committed on close();
+    a failed run is rolled back. Only the tables written here are replaced,
+    other tables in the database are left alone. SQLite has no NaN: 'nan'
+    values are stored as NULL.
+    """
+
+    appendable = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.rows_table = False
+        self.rows = 0
+
+    def resume(self, checkpoint):
+        try:
+            (last,), = self.db.execute('SELECT max(rowid) FROM transactions').fetchall()
+        except sqlite3.OperationalError:
+            raise ValueError(f"{self.path} has no transactions table") from None
+        if (last or 0) != checkpoint['rows']:
+            raise ValueError(f"The transactions table of {self.path} has changed since it was written")
+        self.insert_row = f"INSERT INTO transactions VALUES ({', '.join('?' * len(HEADER))})"
+        self.rows_table = True
+        self.rows = checkpoint['rows']
+
+    def checkpoint(self):
+        return {'rows': self.rows}
+
+    def _replace_table(self, name, header):
+        columns = ', '.join(_quote(column) for column in header)
+        self.db.execute(f'DROP TABLE IF EXISTS {_quote(name)}')
+        self.db.execute(f'CREATE TABLE {_quote(name)} ({columns})')
+        return f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(header))})"
+
+    def write_rows(self, periods, titles, values):
+        if not self.rows_table:
+            self.insert_row = self._replace_table('transactions', HEADER)
+            self.rows_table = True
+        rows = zip(periods, titles, values)
+        while True:
+            batch = list(islice(rows, SQLITE_BATCH))
+            if not batch:
+                break
+            self.db.executemany(self.insert_row, batch)
+            self.rows += len(batch)
+
+    def write_total(self, total):
+        if not self.rows_table:
+            self.write_rows([], [], [])
+        insert = self._replace_table('total_sum', ['Total_Sum'])
+        self.db.execute(insert, (total,))
+
+    def write_table(self, name, header, rows):
+        insert = self._replace_table(table_id(name), header)
+        self.db.executemany(insert, rows)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def abort(self):
+        self.db.rollback()
+        self.db.close()
+
+
+class NpzSink(Sink):
+    """
+    Compact columnar dump (numpy .npz). Data_value is a float64 array;
+    Period and Series_title_1 are dictionary-encoded as uint32 codes into
+    Period_names / Series_title_1_names, so f['Period_names'][f['Period']]
+    gives the strings back. Each table is stored column by column as
+    '<table>/<column>'. The columns are kept in memory until close().
+    """
+
+    def __init__(self, path):
+        if np is None:
+            raise RuntimeError("The npz output needs numpy (pip install numpy)")
+        super().__init__(path)
+        self.columns = None
+        self.arrays = {}
+
+    def write_rows(self, periods, titles, values):
+        if self.columns is None:
+            self.columns = [({}, array('I')), ({}, array('I')), array('d')]
+        (period_index, period_codes), (title_index, title_codes), data = self.columns
+        period_codes.extend([period_index.setdefault(p, len(period_index)) for p in periods])
+        title_codes.extend([title_index.setdefault(t, len(title_index)) for t in titles])
+        data.extend(values)
+
+    def write_total(self, total):
+        if self.columns is None:
+            self.write_rows([], [], [])
+        self.arrays['Total_Sum'] = np.float64(total)
+
+    def write_table(self, name, header, rows):
+        rows = list(rows)
+        for i, column in enumerate(header):
+            cells = [row[i] for row in rows]
+            if all(isinstance(c, str) for c in cells):
+                self.arrays[f'{table_id(name)}/{column}'] = np.array(cells, dtype=str)
+            else:
+                self.arrays[f'{table_id(name)}/{column}'] = np.array(
+                    [np.nan if c is None else c for c in cells], dtype=np.float64)
+
+    def close(self):
+        if self.columns is not None:
+            (period_index, period_codes), (title_index, title_codes), data = self.columns
+            self.arrays.update({
+                'Period': np.frombuffer(period_codes, dtype=np.uint32),
+                'Period_names': np.array(list(period_index), dtype=str),
+                'Series_title_1': np.frombuffer(title_codes, dtype=np.uint32),
+                'Series_title_1_names': np.array(list(title_index), dtype=str),
+                'Data_value': np.frombuffer(data, dtype=np.float64),
+            })
+        np.savez(self.path, **self.arrays)
+
+    def abort(self):
+        pass
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Output format -> sink class, and file extension -> output format
+SINKS = {'xlsx': XlsxSink, 'csv': CsvSink, 'sqlite': SqliteSink, 'npz': NpzSink}
+EXTENSIONS = {'.xlsx': 'xlsx', '.csv': 'csv', '.db': 'sqlite', '.sqlite': 'sqlite',
+              '.sqlite3': 'sqlite', '.npz': 'npz'}
+
+
+def open_sink(path, output_format=None):
+    """
+    Open the sink for an output file, picked by output_format (see SINKS)
+    or else by the file extension (see EXTENSIONS).
+    """
+    if output_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError(f"Cannot tell the output format of {path!r}: "
+                             f"use one of {', '.join(EXTENSIONS)} or pick a format")
+        output_format = EXTENSIONS[extension]
+    if output_format not in SINKS:
+        raise ValueError(f"Unknown output format: {output_format!r} (expected one of {tuple(SINKS)})")
+    return SINKS[output_format](path)
@@ -0,0 +1,116 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields, replace
+
+from desktop_cleaner_bot import OrganizerConfig, organize, setup_logging
+from desktop_cleaner_metrics import RunSummary
+from desktop_cleaner_rules import load_rules
+
+# OrganizerConfig fields given as lists in a manifest but stored as tuples
+_TUPLE_FIELDS = ("include_dirs", "exclude_dirs")
+
+
+def config_from_dict(doc: dict, base: OrganizerConfig | None = None) -> OrganizerConfig:
+    """
+    Build an OrganizerConfig from a manifest entry, on top of 'base' when
+    given. Keys are OrganizerConfig field names; "rules" is a rules file.
+    """
+    known = {f.name for f in fields(OrganizerConfig)}
+    unknown = set(doc) - known
+    if unknown:
+        raise ValueError(f"Unknown config key(s) in manifest: {', '.join(sorted(unknown))}")
+    values = dict(doc)
+    for key in _TUPLE_FIELDS:
+        if key in values:
+            values[key] = tuple(values[key])
+    if isinstance(values.get("rules"), str):
+        values["rules"] = load_rules(values["rules"])
+    if base is not None:
+        return replace(base, **values)
+    return OrganizerConfig(**values)
+
+
+def load_manifest(path: str, base: OrganizerConfig | None = None) -> list[OrganizerConfig]:
+    """
+    Load the configs of a batch from a JSON manifest: either a list of
+    config objects, or {"defaults": {...}, "configs": [...]} where each
+    entry only lists what differs from the defaults. A bare string entry is
+    shorthand for {"source_dir": ...}.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        defaults, items = data.get("defaults", {}), data.get("configs", [])
+    else:
+        defaults, items = {}, data
+    configs = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"source_dir": item}
+        configs.append(config_from_dict({**defaults, **item}, base))
+    return configs
+
+
+@dataclass
+class BatchReport:
+    """Merged summary of a batch, plus the summary (or error) of each source."""
+    total: RunSummary
+    sources: dict[str, RunSummary] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, sort_keys=True)
+
+    def write(self, path: str) -> None:
+        """Write the full report as JSON (.json), or the merged summary as Prometheus text."""
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.to_json() + "\n")
+        else:
+            self.total.write(path)
+
+
+def _init_worker(log_level: str, log_format: str, log_summary: bool) -> None:
+    setup_logging(log_level, log_format, log_summary)
+
+
+def organize_batch(configs: list[OrganizerConfig], processes: int | None = None,
+                   log_level: str = "INFO", log_format: str = "text",
+                   log_summary: bool = False) -> BatchReport:
+    """
+    Organize several sources at once, one organize() run per config spread
+    over a pool of worker processes (os.cpu_count() by default). Sources may
+    share destination folders: names are claimed with O_EXCL placeholders,
+    so two processes never pick the same name. A failing source is reported
+    in BatchReport.failed and does not stop the others.
+    """
+    sources = [cfg.source_dir for cfg in configs]
+    if len(set(sources)) != len(sources):
+        raise ValueError("Each source directory may appear only once in a batch")
+    journals = [cfg.journal for cfg in configs if cfg.journal]
+    if len(set(journals)) != len(journals):
+        raise ValueError("Configs in a batch cannot share a journal file")
+
+    report = BatchReport(total=RunSummary())
+    if not configs:
+        return report
+    processes = min(processes or os.cpu_count() or 1, len(configs))
+    start = time.perf_counter()
+    # spawn: workers start from a clean interpreter (no inherited log threads)
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(log_level, log_format, log_summary))
+    with pool:
+        futures = {pool.submit(organize, cfg): cfg.source_dir for cfg in configs}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                report.sources[source] = future.result()
+            except Exception as e:
+                logging.error("Organizing %s failed: %s", source, e)
+                report.failed[source] = f"{type(e).__name__}: {e}"
+    report.total = RunSummary.merged(report.sources.values(), time.perf_counter() - start)
+    return report
@@ -1,9 +1,31 @@
+import asyncio
+import errno
+import json
 import logging
 import os
+import re
 import shutil
-from dataclasses import dataclass
+import sys
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from fnmatch import fnmatch
+from itertools import islice
 from os import scandir
-from os.path import exists, isdir, join, splitext
+from os.path import abspath, basename, dirname, exists, isdir, join, normcase, relpath, splitext
+from stat import S_ISDIR, S_ISREG
+
+from desktop_cleaner_copy import FSYNC_POLICIES, CopyEngine
+from desktop_cleaner_logging import LOG_FORMATS, TEXT_FORMAT, JsonFormatter, LocalQueueHandler, file_event
+from desktop_cleaner_logging import install as install_logging
+from desktop_cleaner_journal import DoneSet, Journal, read_jsonl
+from desktop_cleaner_metrics import NULL_METRICS, Metrics, RunSummary
+from desktop_cleaner_progress import ProgressReporter, RunControl
+from desktop_cleaner_dedupe import DEDUPE_POLICIES, DuplicateFinder, HashCache, default_cache_path
+from desktop_cleaner_rules import RuleSet, load_rules
+from desktop_cleaner_sniff import SNIFF_BATCH, SNIFF_MODES, SignatureCache, Sniffer
 
 # Known extensions (normalized to lowercase)
 AUDIO_EXTENSIONS = {
@@ -13,8 +35,8 @@ AUDIO_EXTENSIONS = {
 IMAGE_EXTENSIONS = {
     ".jpg", ".jpeg", ".jpe", ".jif", ".jfif", ".jfi",
     ".png", ".gif", ".webp", ".tiff", ".tif", ".psd",
-    ".raw", ".arw", ".cr2", ".nrw", ".k25", ".bmp",
-    ".dib", ".heif", ".heic", ".ind", ".indd", ".indt",
+    ".raw", ".arw", ".cr2", ".cr3", ".nrw", ".k25", ".bmp",
+    ".dib", ".heif", ".heic", ".avif", ".ind", ".indd", ".indt",
     ".jp2", ".j2k", ".jpf", ".jpx", ".jpm", ".mj2",
     ".svg", ".svgz", ".ai", ".eps", ".ico"
 }
@@ -30,8 +52,15 @@ DOC_EXTENSIONS = {
     ".md", ".json", ".yaml", ".yml", ".xml"
 }
 
+KNOWN_EXTENSIONS = AUDIO_EXTENSIONS | IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | DOC_EXTENSIONS
+
 TEN_MB = 10 * 1024 * 1024
 
+# organize_async(): entries scanned per offloaded batch, and the default
+# number of blocking filesystem calls in flight per event loop
+ASYNC_BATCH = 256
+IO_CONCURRENCY = 32
+
 
 @dataclass
 class OrganizerConfig:
@@ -43,6 +72,36 @@ class OrganizerConfig:
     dest_dir_documents: str
     sfx_size_threshold: int = TEN_MB
     dry_run: bool = False
+    # Number of threads used to move files; 1 keeps the sequential path
+    workers: int = 1
+    # Recursive scan: depth limit (None = unlimited) and directory patterns
+    recursive: bool = False
+    max_depth: int | None = None
+    include_dirs: tuple[str, ...] = ()
+    exclude_dirs: tuple[str, ...] = ()
+    # Duplicate handling: None (off), "skip", "delete" or "hardlink"
+    dedupe: str | None = None
+    hash_cache: str | None = None
+    # Custom routing rules, consulted before the built-in categories
+    rules: RuleSet | None = None
+    # Content sniffing: None (off), "missing" (unknown/no extension) or "all"
+    sniff: str | None = None
+    sniff_cache: str | None = None
+    # JSONL journal of completed moves, usable for resume and --undo
+    journal: str | None = None
+    # When cross-device copies are fsync'ed: "always", "batch" or "never"
+    fsync: str = "batch"
+    # Record per-phase latencies in the run summary (counters are always kept)
+    metrics: bool = False
+
+
+@dataclass
+class PlannedMove:
+    """One line of a move plan: where a file goes and which rule sent it there."""
+    src: str
+    dst: str
+    size: int
+    rule: str
 
 
 def make_unique_name(dest: str, name: str) -> str:
@@ -59,24 +118,225 @@ def make_unique_name(dest: str, name: str) -> str:
     return candidate
 
 
-def safe_move_entry(entry: os.DirEntry, dest_dir: str, name: str, dry_run: bool = False) -> str:
+# Matches names that already carry a "(n)" collision suffix, e.g. "IMG_0001(3)"
+_SUFFIX_RE = re.compile(r"^(.*)\((\d+)\)$")
+
+
+class DestinationIndex:
+    """
+    In-memory index of the names in one destination directory.
+
+    The directory is listed once with a single scandir. The index keeps the
+    names already present plus, for every base name, the highest "(n)" suffix
+    seen, so picking a free name is O(1) instead of one exists() probe per
+    candidate. Names are claimed with an O_EXCL placeholder, so two cleaners
+    writing into the same folder can never pick the same name.
+    """
+
+    def __init__(self, dest_dir: str, metrics: Metrics = NULL_METRICS):
+        self.dest_dir = dest_dir
+        self.metrics = metrics
+        self.st_dev: int | None = None
+        self._lock = threading.Lock()
+        self._names: set[str] = set()
+        self._highest: dict[tuple[str, str], int] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        # A missing directory is only created once a name is reserved in it,
+        # so planning and dry runs leave the filesystem untouched
+        try:
+            with scandir(self.dest_dir) as entries:
+                for entry in entries:
+                    self._record(entry.name)
+            self.st_dev = os.stat(self.dest_dir).st_dev
+        except FileNotFoundError:
+            pass
+        self._loaded = True
+
+    def _create(self) -> None:
+        start = self.metrics.clock()
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self.st_dev = os.stat(self.dest_dir).st_dev
+        self.metrics.observe("makedirs", start)
+
+    def _record(self, name: str) -> None:
+        self._names.add(normcase(name))
+        base, ext = splitext(name)
+        m = _SUFFIX_RE.match(base)
+        if m:
+            key = (normcase(m.group(1)), normcase(ext))
+            n = int(m.group(2))
+            if n > self._highest.get(key, 0):
+                self._highest[key] = n
+
+    def _reserve(self, name: str) -> bool:
+        """Atomically create an empty placeholder; False if the name is taken."""
+        try:
+            fd = os.open(join(self.dest_dir, name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def claim(self, name: str, reserve: bool = True) -> str:
+        """
+        Return a free name for 'name' in the directory, appending '(n)' before
+        the extension on collision. With reserve=True an empty placeholder is
+        created under the returned name; the caller must replace it (or call
+        release()) afterwards.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if reserve and self.st_dev is None:
+                self._create()
+            base, ext = splitext(name)
+            key = (normcase(base), normcase(ext))
+            candidate = name
+            while True:
+                if normcase(candidate) not in self._names:
+                    if not reserve or self._reserve(candidate):
+                        self._record(candidate)
+                        return candidate
+                    # Another process created it since the directory was listed
+                    self._record(candidate)
+                n = self._highest.get(key, 0) + 1
+                self._highest[key] = n
+                candidate = f"{base}({n}){ext}"
+
+    def release(self, name: str) -> None:
+        """Remove the placeholder of a claimed name whose move failed."""
+        path = join(self.dest_dir, name)
+        try:
+            if os.stat(path).st_size == 0:
+                os.remove(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._names.discard(normcase(name))
+
+
+class DestinationIndexes:
+    """Per-run registry with one DestinationIndex per destination directory."""
+
+    def __init__(self, metrics: Metrics = NULL_METRICS):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._by_dir: dict[str, DestinationIndex] = {}
+
+    def get(self, dest_dir: str) -> DestinationIndex:
+        with self._lock:
+            index = self._by_dir.get(dest_dir)
+            if index is None:
+                index = self._by_dir[dest_dir] = DestinationIndex(dest_dir, self.metrics)
+            return index
+
+
+class PathEntry:
+    """
+    Minimal os.DirEntry stand-in for a single path, for callers that learn
+    about files one at a time (e.g. watch mode) instead of through scandir.
+    The lstat result is cached like DirEntry does.
+    """
+
+    __slots__ = ("path", "name", "_lstat")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._lstat = None
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        if follow_symlinks:
+            return os.stat(self.path)
+        if self._lstat is None:
+            self._lstat = os.lstat(self.path)
+        return self._lstat
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        try:
+            return S_ISREG(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        try:
+            return S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    def __repr__(self):
+        return f"<PathEntry {self.path!r}>"
+
+
+def safe_move_entry(entry: os.DirEntry, dest_dir: str, name: str, dry_run: bool = False,
+                    index: DestinationIndex | None = None, copier: CopyEngine | None = None,
+                    metrics: Metrics = NULL_METRICS) -> str:
     """
     Move the DirEntry to dest_dir using a unique name. Creates the dest_dir if needed.
     Returns the destination path (or the would-be path for dry-run).
+    With an index, the name is claimed from it instead of probing the directory.
+    With a copier, cross-device moves use its copy engine instead of shutil.move.
     """
-    os.makedirs(dest_dir, exist_ok=True)
-    target_name = make_unique_name(dest_dir, name)
+    start = metrics.clock()
+    if index is None:
+        os.makedirs(dest_dir, exist_ok=True)
+        target_name = make_unique_name(dest_dir, name)
+    else:
+        target_name = index.claim(name, reserve=not dry_run)
+    metrics.observe("naming", start)
     src_path = entry.path
     dst_path = join(dest_dir, target_name)
 
     if dry_run:
-        logging.info("[dry-run] Would move: %s -> %s", src_path, dst_path)
+        logging.debug("[dry-run] Would move: %s -> %s", src_path, dst_path)
         return dst_path
 
-    shutil.move(src_path, dst_path)
+    start = metrics.clock()
+    try:
+        if not (_same_device(entry, dest_dir, index) and _rename(src_path, dst_path)):
+            if copier is not None:
+                copier.move(src_path, dst_path)
+            else:
+                shutil.move(src_path, dst_path)
+    except BaseException:
+        if index is not None:
+            index.release(target_name)
+        raise
+    metrics.observe("move", start)
     return dst_path
 
 
+def _rename(src_path: str, dst_path: str) -> bool:
+    """
+    Fast path: a plain rename (over our own placeholder, if any). Returns
+    False when the kernel refuses it with EXDEV, e.g. between two bind
+    mounts of one filesystem (same st_dev), so the caller copies instead.
+    """
+    try:
+        os.replace(src_path, dst_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        return False
+    return True
+
+
+def _same_device(entry: os.DirEntry, dest_dir: str, index: DestinationIndex | None = None) -> bool:
+    """
+    Return True when the entry and dest_dir live on the same filesystem,
+    so the move can be done with a single rename.
+    """
+    try:
+        dest_dev = index.st_dev if index is not None else None
+        if dest_dev is None:
+            dest_dev = os.stat(dest_dir).st_dev
+        return entry.stat(follow_symlinks=False).st_dev == dest_dev
+    except OSError:
+        return False
+
+
 def determine_destination(name_lower: str, ext_lower: str, size_bytes: int, cfg: OrganizerConfig) -> str | None:
     """
     Determine the destination directory for the given file details.
@@ -99,94 +359,895 @@ def determine_destination(name_lower: str, ext_lower: str, size_bytes: int, cfg:
     return None
 
 
-def organize(cfg: OrganizerConfig) -> None:
+def _category(ext_lower: str) -> int:
+    """Index of the built-in category containing ext_lower, or -1."""
+    for i, exts in enumerate((AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, IMAGE_EXTENSIONS, DOC_EXTENSIONS)):
+        if ext_lower in exts:
+            return i
+    return -1
+
+
+def destination_dirs(cfg: OrganizerConfig) -> list[str]:
+    """Return every destination directory of the configuration."""
+    dirs = [cfg.dest_dir_music, cfg.dest_dir_sfx, cfg.dest_dir_video,
+            cfg.dest_dir_image, cfg.dest_dir_documents]
+    if cfg.rules is not None:
+        dirs.extend(sorted(cfg.rules.destinations))
+    return dirs
+
+
+def dir_matches(patterns: tuple[str, ...], name: str, rel_path: str) -> bool:
+    """Match a directory against glob patterns by its name or its path relative to the source."""
+    return any(fnmatch(name, p) or fnmatch(rel_path, p) for p in patterns)
+
+
+def iter_entries(cfg: OrganizerConfig, metrics: Metrics = NULL_METRICS):
+    """
+    Yield the DirEntry objects to consider for organizing.
+
+    Without cfg.recursive only the top level of the source directory is listed.
+    With it, the tree is walked depth-first as a chain of scandir iterators, so
+    memory grows with the depth of the tree and not with its size:
+    - cfg.max_depth limits how deep to go (0 = top level only)
+    - cfg.exclude_dirs patterns prune matching directories
+    - cfg.include_dirs patterns, when given, only take files from matching
+      directories and everything below them (top-level files are always taken)
+    - destination directories are never entered
+    - symlinked directories are not followed, and a directory already on the
+      current path (bind-mount loop) is skipped
+    - directories that vanish or cannot be read are logged and skipped
+    """
+    dest_paths = {normcase(abspath(d)) for d in destination_dirs(cfg)}
+    dest_ids = set()
+    for d in destination_dirs(cfg):
+        try:
+            st = os.stat(d)
+            dest_ids.add((st.st_dev, st.st_ino))
+        except OSError:
+            # Not created yet; the path check above still applies
+            pass
+
+    try:
+        root_st = os.stat(cfg.source_dir)
+        root_id = (root_st.st_dev, root_st.st_ino)
+    except OSError:
+        root_id = None
+
+    # Stack of (scandir iterator, depth, included, directory identity)
+    stack = []
+    ancestors = set()
+
+    def push(path: str, depth: int, included: bool, dir_id) -> None:
+        try:
+            it = scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            logging.warning("Directory disappeared during scan, skipping: %s", path)
+            return
+        except OSError as e:
+            logging.warning("Cannot read directory, skipping: %s (%s)", path, e)
+            return
+        stack.append((it, depth, included, dir_id))
+        ancestors.add(dir_id)
+
+    push(cfg.source_dir, 0, not cfg.include_dirs, root_id)
+    try:
+        while stack:
+            it, depth, included, dir_id = stack[-1]
+            start = metrics.clock()
+            try:
+                entry = next(it, None)
+                metrics.observe("scandir", start)
+            except OSError as e:
+                logging.warning("Directory listing failed, skipping the rest of it: %s", e)
+                entry = None
+            if entry is None:
+                it.close()
+                stack.pop()
+                ancestors.discard(dir_id)
+                continue
+
+            if not cfg.recursive or (cfg.max_depth is not None and depth >= cfg.max_depth):
+                if depth == 0 or included:
+                    metrics.count("files_seen")
+                    yield entry
+                continue
+
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                if depth == 0 or included:
+                    metrics.count("files_seen")
+                    yield entry
+                continue
+
+            if normcase(abspath(entry.path)) in dest_paths:
+                logging.debug("Skipping destination directory: %s", entry.path)
+                continue
+            rel_path = relpath(entry.path, cfg.source_dir).replace(os.sep, "/")
+            if cfg.exclude_dirs and dir_matches(cfg.exclude_dirs, entry.name, rel_path):
+                logging.debug("Skipping excluded directory: %s", entry.path)
+                continue
+            child_included = included or dir_matches(cfg.include_dirs, entry.name, rel_path)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                logging.warning("Directory disappeared during scan, skipping: %s", entry.path)
+                continue
+            child_id = (st.st_dev, st.st_ino)
+            if child_id in dest_ids:
+                logging.debug("Skipping destination directory: %s", entry.path)
+                continue
+            if child_id in ancestors:
+                logging.warning("Directory loop detected, skipping: %s", entry.path)
+                continue
+            # Directories are always entered so includes can match deeper down;
+            # only files from included directories are yielded
+            push(entry.path, depth + 1, child_included, child_id)
+    finally:
+        for it, *_ in stack:
+            it.close()
+
+
+def route_entry(entry, cfg: OrganizerConfig, sniffed_ext: str | None = None,
+                metrics: Metrics = NULL_METRICS) -> str | None:
+    """
+    Decide where a single entry goes. Returns the destination directory, or
+    None (after logging why) when the entry should be left alone.
+    A sniffed_ext (from content sniffing) replaces the name's extension when
+    it belongs to a different category.
+    """
+    # Filter: only regular files (no dirs, no symlinks)
+    if not entry.is_file(follow_symlinks=False):
+        file_event(logging.DEBUG, "Skipping non-file: %s", entry.path, event="skipped", reason="non_file")
+        metrics.skip("non_file")
+        return None
+
+    name = entry.name
+    name_lower = name.lower()
+    ext_lower = splitext(name_lower)[1]
+    if sniffed_ext and sniffed_ext != ext_lower and _category(sniffed_ext) != _category(ext_lower):
+        logging.debug("Content of %s looks like %s, routing it as such", name, sniffed_ext)
+        ext_lower = sniffed_ext
+
+    if not ext_lower and (cfg.rules is None or not cfg.rules.has_fallback_rules):
+        file_event(logging.DEBUG, "Skipping file with no extension: %s", name,
+                   event="skipped", reason="no_extension")
+        metrics.skip("no_extension")
+        return None
+
+    start = metrics.clock()
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except FileNotFoundError:
+        # The file may have been removed or moved during scanning
+        file_event(logging.WARNING, "File disappeared during scan, skipping: %s", entry.path,
+                   event="skipped", reason="vanished")
+        metrics.skip("vanished")
+        return None
+    metrics.observe("stat", start)
+
+    start = metrics.clock()
+    dest_dir = None
+    if cfg.rules is not None:
+        dest_dir = cfg.rules.destination(name, name_lower, ext_lower, st)
+    if not dest_dir:
+        dest_dir = determine_destination(name_lower, ext_lower, st.st_size, cfg)
+    metrics.observe("route", start)
+    if not dest_dir:
+        file_event(logging.DEBUG, "Skipping unsupported extension (%s): %s", ext_lower, name,
+                   event="skipped", reason="unsupported")
+        metrics.skip("unsupported")
+        return None
+    return dest_dir
+
+
+def _batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_moves(cfg: OrganizerConfig, ctx: "RunContext | None" = None):
+    """
+    Scan the source directory and yield (entry, dest_dir) for every entry that
+    should be moved. Entries that fail during scanning are logged and skipped.
+    With content sniffing, entries are handled in batches so their headers
+    can be read in parallel.
+    """
+    metrics = ctx.metrics if ctx is not None else NULL_METRICS
+    sniffing = ctx is not None and ctx.sniffer is not None
+    control = ctx.control if ctx is not None else None
+    progress = ctx.progress if ctx is not None else None
+    entries = iter_entries(cfg, metrics)
+    batches = _batched(entries, SNIFF_BATCH) if sniffing else ([e] for e in entries)
+    for batch in batches:
+        sniffed = ctx.sniff(batch, cfg) if sniffing else {}
+        for entry in batch:
+            if control is not None and not control.wait():
+                return
+            try:
+                dest_dir = route_entry(entry, cfg, sniffed.get(entry.path), metrics)
+            except Exception:
+                # Keep processing other entries even if one fails
+                logging.exception("Failed processing entry: %s", getattr(entry, "path", entry))
+                metrics.count("errors")
+                dest_dir = None
+            if dest_dir:
+                yield entry, dest_dir
+            elif progress is not None:
+                progress.advance()
+
+
+def count_entries(cfg: OrganizerConfig, control: RunControl | None = None) -> int | None:
+    """
+    Fast pre-count of the entries a run will look at (the scan alone, no
+    stat or routing), used as the total for progress reporting. With a
+    control, the count waits while the run is paused and stops (returning
+    None) once it is cancelled.
+    """
+    if control is None:
+        return sum(1 for _ in iter_entries(cfg))
+    count = 0
+    for _ in iter_entries(cfg):
+        if not control.wait():
+            return None
+        count += 1
+    return count
+
+
+class RunContext:
+    """
+    State shared by every move of one run: metrics, the destination name
+    indexes, the copy engine and, when enabled, the duplicate finder, the
+    content sniffer, the move journal, progress reporting and the
+    pause/cancel control.
+    """
+
+    def __init__(self, cfg: OrganizerConfig, progress: ProgressReporter | None = None,
+                 control: RunControl | None = None):
+        self.progress = progress
+        self.control = control
+        self.metrics = Metrics(timed=cfg.metrics)
+        self.indexes = DestinationIndexes(self.metrics)
+        self.duplicates: DuplicateFinder | None = None
+        if cfg.dedupe:
+            if cfg.dedupe not in DEDUPE_POLICIES:
+                raise ValueError(f"Unknown dedupe policy: {cfg.dedupe!r} (expected one of {DEDUPE_POLICIES})")
+            self.duplicates = DuplicateFinder(HashCache(cfg.hash_cache or ":memory:"))
+        self.sniffer: Sniffer | None = None
+        if cfg.sniff:
+            if cfg.sniff not in SNIFF_MODES:
+                raise ValueError(f"Unknown sniff mode: {cfg.sniff!r} (expected one of {SNIFF_MODES})")
+            self.sniffer = Sniffer(SignatureCache(cfg.sniff_cache or ":memory:"))
+        self.journal = Journal(cfg.journal) if cfg.journal else None
+        self.copier = CopyEngine(cfg.fsync)
+
+        # Human-readable name of the rule behind each destination directory
+        self.labels = {
+            cfg.dest_dir_music: "music", cfg.dest_dir_sfx: "sfx", cfg.dest_dir_video: "video",
+            cfg.dest_dir_image: "image", cfg.dest_dir_documents: "documents",
+        }
+        if cfg.rules is not None:
+            for rule in reversed(cfg.rules.rules):
+                self.labels[rule.dest] = rule.name
+
+    def sniff(self, entries, cfg: OrganizerConfig) -> dict[str, str | None]:
+        """
+        Sniff the content of the regular files among entries that cfg.sniff
+        selects: every file for "all", only files whose extension is not a
+        known one for "missing".
+        """
+        selected = []
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if cfg.sniff == "all" or splitext(entry.name)[1].lower() not in KNOWN_EXTENSIONS:
+                selected.append(entry)
+        return self.sniffer.sniff_many(selected) if selected else {}
+
+    def close(self) -> None:
+        self.copier.flush()
+        if self.duplicates is not None:
+            self.duplicates.close()
+        if self.sniffer is not None:
+            self.sniffer.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def handle_duplicate(entry: os.DirEntry, original: str, dest_dir: str, cfg: OrganizerConfig,
+                     index: DestinationIndex) -> None:
+    """
+    Apply cfg.dedupe to an entry whose content already exists at 'original':
+    - skip: leave the entry where it is
+    - delete: remove the entry
+    - hardlink: give the entry's name in dest_dir to a hard link of 'original'
+      and remove the entry, so the name survives without a second copy
+    """
+    policy = cfg.dedupe
+    fields = {"event": "duplicate", "dest": dest_dir, "src": entry.path}
+    if policy == "skip":
+        file_event(logging.INFO, "Duplicate of %s, leaving in place: %s", original, entry.path, **fields)
+        return
+    if cfg.dry_run:
+        file_event(logging.INFO, "[dry-run] Would %s duplicate of %s: %s", policy, original, entry.path, **fields)
+        return
+
+    if policy == "hardlink":
+        target_name = index.claim(entry.name)
+        dst_path = join(dest_dir, target_name)
+        tmp_path = join(dest_dir, f".{target_name}.{os.getpid()}.link")
+        try:
+            os.link(original, tmp_path)
+            # Atomically replace the placeholder left by claim()
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            if exists(tmp_path):
+                os.remove(tmp_path)
+            index.release(target_name)
+            raise
+        file_event(logging.INFO, "Hard-linked duplicate of %s as %s: %s", original, dst_path, entry.path, **fields)
+    else:
+        file_event(logging.INFO, "Deleted duplicate of %s: %s", original, entry.path, **fields)
+    os.remove(entry.path)
+
+
+def move_entry(entry: os.DirEntry, dest_dir: str, cfg: OrganizerConfig,
+               ctx: RunContext | None = None, name: str | None = None, seq: int | None = None) -> str | None:
+    """
+    Move a single entry to dest_dir (as 'name', defaulting to the entry's own)
+    and log the outcome. Returns the destination path, or None when the entry
+    was not moved. Errors are logged and swallowed so one bad entry never
+    stops the run. Completed moves go to the run's journal, tagged with 'seq'.
+    Waits while the run is paused, and does nothing once it is cancelled.
+    """
+    name = name or entry.name
+    if ctx is not None and ctx.control is not None and not ctx.control.wait():
+        return None
+    moved_bytes = 0
+    try:
+        index = ctx.indexes.get(dest_dir) if ctx is not None else None
+        duplicates = ctx.duplicates if ctx is not None else None
+        if duplicates is not None:
+            st = entry.stat(follow_symlinks=False)
+            original = duplicates.find(entry.path, st, dest_dir)
+            if original is not None:
+                handle_duplicate(entry, original, dest_dir, cfg, index)
+                ctx.metrics.count("duplicates")
+                return None
+
+        metrics = ctx.metrics if ctx is not None else NULL_METRICS
+        copier = ctx.copier if ctx is not None else None
+        size = entry.stat(follow_symlinks=False).st_size
+        dst_path = safe_move_entry(entry, dest_dir, name, cfg.dry_run, index, copier, metrics)
+        metrics.count("files_moved")
+        metrics.count("bytes_moved", size)
+        if duplicates is not None:
+            # In dry-run the content is still at the source path
+            duplicates.add(entry.path if cfg.dry_run else dst_path, size, dest_dir)
+        fields = {"event": "moved", "dest": dest_dir, "src": entry.path, "dst": dst_path}
+        if cfg.dry_run:
+            file_event(logging.INFO, "[dry-run] Would move file to %s: %s", dest_dir, name, **fields)
+        else:
+            file_event(logging.INFO, "Moved file to %s: %s", dest_dir, name, **fields)
+            if ctx is not None and ctx.journal is not None:
+                ctx.journal.record(entry.path, dst_path, seq)
+        moved_bytes = size
+        return dst_path
+    except Exception:
+        logging.exception("Failed processing entry: %s", getattr(entry, "path", entry))
+        if ctx is not None:
+            ctx.metrics.count("errors")
+        return None
+    finally:
+        if ctx is not None and ctx.progress is not None:
+            ctx.progress.advance(moved_bytes)
+
+
+class DestinationLanes:
+    """
+    Run moves on a bounded thread pool, with one lane per destination directory.
+
+    Moves into the same directory run one at a time and in submission order,
+    so unique names come out exactly as in the sequential path, while moves
+    into different directories proceed in parallel. The number of queued
+    moves is bounded so a fast scanner cannot outrun the workers.
+
+    If a move raises, the moves still queued are dropped and the first error
+    is raised again by submit() or close(), as the sequential path would.
+    """
+
+    def __init__(self, workers: int, max_pending: int | None = None):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cleaner-move")
+        self._lock = threading.Lock()
+        self._lanes: dict[str, deque] = {}
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 64)
+        self._error: BaseException | None = None
+
+    def submit(self, dest_dir: str, fn, *args) -> None:
+        """Queue fn(*args) on the lane of dest_dir."""
+        self._raise_error()
+        self._slots.acquire()
+        with self._lock:
+            lane = self._lanes.get(dest_dir)
+            if lane is not None:
+                # A worker is already draining this lane and will pick it up
+                lane.append((fn, args))
+                return
+            self._lanes[dest_dir] = deque([(fn, args)])
+        self._pool.submit(self._drain, dest_dir)
+
+    def _drain(self, dest_dir: str) -> None:
+        while True:
+            with self._lock:
+                lane = self._lanes[dest_dir]
+                if not lane:
+                    del self._lanes[dest_dir]
+                    return
+                fn, args = lane.popleft()
+                failed = self._error is not None
+            try:
+                if not failed:
+                    fn(*args)
+            except BaseException as e:
+                # Keep draining (without running anything) so the lane is
+                # removed and every queued move gives its slot back
+                with self._lock:
+                    if self._error is None:
+                        self._error = e
+            finally:
+                self._slots.release()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        """Wait for the queued moves, then raise the first error of a move, if any."""
+        self._pool.shutdown(wait=True)
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.shutdown(wait=True)
+        if exc_type is None:
+            self._raise_error()
+
+
+def organize(cfg: OrganizerConfig, progress=None, control: RunControl | None = None,
+             precount: bool = False) -> RunSummary:
     """
     Scan the source directory and move supported files to their destinations.
+    Returns a RunSummary of the run (per-phase timings when cfg.metrics is set).
+    - progress, if given, is called with a throttled Progress snapshot
+      (with precount=True, files_total comes from a quick scan beforehand)
+    - control (a RunControl) pauses the run or cancels it between entries
     - Skips non-files and symlinks
     - Uses normalized lowercase extension checks
-    - Preserves existing files by generating unique names
+    - Preserves existing files by claiming unique names from a per-run name index
     - Wraps moves with error handling and logging
+    - With cfg.workers > 1, spreads moves over a thread pool grouped by destination
+    - With cfg.dedupe, handles files already present in the destination per policy
+    - With cfg.sniff, routes by content signature where the extension is missing or wrong
     """
     if not isdir(cfg.source_dir):
         raise NotADirectoryError(f"Source directory does not exist or is not a directory: {cfg.source_dir}")
 
-    with scandir(cfg.source_dir) as entries:
-        for entry in entries:
-            try:
-                # Filter: only regular files (no dirs, no symlinks)
-                if not entry.is_file(follow_symlinks=False):
-                    logging.debug("Skipping non-file: %s", entry.path)
-                    continue
+    reporter = None
+    if progress is not None:
+        reporter = ProgressReporter(progress, count_entries(cfg, control) if precount else None, control)
+    with RunContext(cfg, reporter, control) as ctx:
+        if cfg.workers <= 1:
+            for entry, dest_dir in iter_moves(cfg, ctx):
+                move_entry(entry, dest_dir, cfg, ctx)
+        else:
+            with DestinationLanes(cfg.workers) as lanes:
+                for entry, dest_dir in iter_moves(cfg, ctx):
+                    lanes.submit(dest_dir, move_entry, entry, dest_dir, cfg, ctx)
+    return _finish_run(ctx)
 
-                name = entry.name
-                name_lower = name.lower()
-                ext_lower = splitext(name_lower)[1]
 
-                if not ext_lower:
-                    logging.debug("Skipping file with no extension: %s", name)
-                    continue
+_io_semaphores = weakref.WeakKeyDictionary()
 
-                try:
-                    st = entry.stat(follow_symlinks=False)
-                except FileNotFoundError:
-                    # The file may have been removed or moved during scanning
-                    logging.warning("File disappeared during scan, skipping: %s", entry.path)
-                    continue
 
-                dest_dir = determine_destination(name_lower, ext_lower, st.st_size, cfg)
-                if not dest_dir:
-                    logging.debug("Skipping unsupported extension (%s): %s", ext_lower, name)
-                    continue
+def io_semaphore() -> asyncio.Semaphore:
+    """The I/O semaphore shared by every organize_async() run on the current event loop."""
+    loop = asyncio.get_running_loop()
+    sem = _io_semaphores.get(loop)
+    if sem is None:
+        sem = _io_semaphores[loop] = asyncio.Semaphore(IO_CONCURRENCY)
+    return sem
 
-                safe_move_entry(entry, dest_dir, name, cfg.dry_run)
-                if cfg.dry_run:
-                    logging.info("[dry-run] Would move file to %s: %s", dest_dir, name)
-                else:
-                    logging.info("Moved file to %s: %s", dest_dir, name)
 
-            except Exception:
-                # Keep processing other entries even if one fails
-                logging.exception("Failed processing entry: %s", getattr(entry, "path", entry))
+async def _offload(sem: asyncio.Semaphore, fn, *args):
+    async with sem:
+        return await asyncio.to_thread(fn, *args)
+
+
+def _move_group(group: list, cfg: OrganizerConfig, ctx: RunContext) -> None:
+    for entry, dest_dir in group:
+        move_entry(entry, dest_dir, cfg, ctx)
+
+
+def _close_run(moves, ctx: RunContext) -> None:
+    try:
+        moves.close()
+    finally:
+        ctx.close()
+
+
+async def organize_async(cfg: OrganizerConfig, *, concurrency: int = 8,
+                         io_limit: asyncio.Semaphore | None = None, progress=None) -> RunSummary:
+    """
+    Coroutine version of organize(), for services that organize many folders
+    at once on one event loop. Routing and naming are the same as organize():
+    the scan runs in batches of ASYNC_BATCH entries and each batch's moves
+    run as one group per destination, groups for the same destination in
+    scan order. Every blocking call goes through asyncio.to_thread under
+    io_limit, which defaults to io_semaphore() so all runs on the loop share
+    one I/O budget; at most 'concurrency' groups of this run are in flight,
+    which holds the scan back when moves fall behind.
+
+    Cancelling the task stops the run between entries: moves and the scan
+    batch already running finish, the run's state is closed, and
+    CancelledError propagates.
+    """
+    sem = io_limit or io_semaphore()
+    if not await _offload(sem, isdir, cfg.source_dir):
+        raise NotADirectoryError(f"Source directory does not exist or is not a directory: {cfg.source_dir}")
+
+    control = RunControl()
+    reporter = ProgressReporter(progress, None, control) if progress is not None else None
+    opening = asyncio.ensure_future(_offload(sem, RunContext, cfg, reporter, control))
+    try:
+        ctx = await asyncio.shield(opening)
+    except BaseException:
+        # Cancelled while the context is built in a thread: close it once it exists
+        await asyncio.wait([opening])
+        if opening.exception() is None:
+            await asyncio.to_thread(opening.result().close)
+        raise
+    moves = iter_moves(cfg, ctx)
+    slots = asyncio.Semaphore(concurrency)
+    tails: dict[str, asyncio.Task] = {}
+    pending: set[asyncio.Task] = set()
+    # The scan batch running in a worker thread: the generator cannot be
+    # closed while that thread is inside it
+    scan: asyncio.Task | None = None
+
+    async def run_group(group: list, previous: asyncio.Task | None) -> None:
+        try:
+            if previous is not None:
+                # Keep moves into one directory in scan order, as with lanes
+                await asyncio.wait([previous])
+            await _offload(sem, _move_group, group, cfg, ctx)
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            scan = asyncio.ensure_future(_offload(sem, lambda: list(islice(moves, ASYNC_BATCH))))
+            # Shielded: cancelling the run must not abandon the thread mid-scan
+            batch = await asyncio.shield(scan)
+            if not batch:
+                break
+            groups: dict[str, list] = {}
+            for entry, dest_dir in batch:
+                groups.setdefault(dest_dir, []).append((entry, dest_dir))
+            for dest_dir, group in groups.items():
+                await slots.acquire()
+                task = asyncio.create_task(run_group(group, tails.get(dest_dir)))
+                tails[dest_dir] = task
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+    except BaseException:
+        # Queued groups see the cancelled control and skip their moves
+        control.cancel()
+        raise
+    finally:
+        # The cancelled control makes the scan stop at its next entry
+        in_flight = set(pending) | ({scan} if scan is not None and not scan.done() else set())
+        if in_flight:
+            await asyncio.wait(in_flight)
+        await asyncio.to_thread(_close_run, moves, ctx)
+    return _finish_run(ctx)
+
+
+def _finish_run(ctx: RunContext) -> RunSummary:
+    summary = ctx.metrics.summary()
+    summary.cancelled = ctx.control is not None and ctx.control.cancelled
+    if summary.cancelled:
+        logging.warning("Run cancelled")
+    if ctx.progress is not None:
+        ctx.progress.finish()
+    return summary
+
+
+def plan(cfg: OrganizerConfig, ctx: RunContext | None = None):
+    """
+    Planning phase: scan and route like organize(), but only yield a
+    PlannedMove per file. Names are claimed in memory only, so planned
+    destinations are collision-free among themselves and with what is on
+    disk, and nothing on disk changes.
+    """
+    if not isdir(cfg.source_dir):
+        raise NotADirectoryError(f"Source directory does not exist or is not a directory: {cfg.source_dir}")
+
+    own_ctx = ctx is None
+    if own_ctx:
+        ctx = RunContext(cfg)
+    try:
+        for entry, dest_dir in iter_moves(cfg, ctx):
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+                target_name = ctx.indexes.get(dest_dir).claim(entry.name, reserve=False)
+            except OSError:
+                file_event(logging.WARNING, "File disappeared during scan, skipping: %s", entry.path,
+                           event="skipped", reason="vanished")
                 continue
+            yield PlannedMove(entry.path, join(dest_dir, target_name), size, ctx.labels.get(dest_dir, ""))
+    finally:
+        if own_ctx:
+            ctx.close()
+
+
+def write_plan(cfg: OrganizerConfig, out) -> int:
+    """Stream the plan of cfg to the text file 'out' as JSONL. Returns the number of moves."""
+    count = 0
+    for move in plan(cfg):
+        out.write(json.dumps(asdict(move), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def _apply_planned(move: dict, n: int, cfg: OrganizerConfig, ctx: RunContext) -> None:
+    src, dst = move["src"], move["dst"]
+    if not exists(src):
+        if exists(dst):
+            logging.debug("Already moved (not yet journaled), skipping: %s", src)
+        else:
+            logging.warning("Planned source no longer exists, skipping: %s", src)
+        if ctx.progress is not None:
+            ctx.progress.advance()
+        return
+    move_entry(PathEntry(src), dirname(dst), cfg, ctx, name=basename(dst), seq=n)
+
+
+def apply_plan(plan_path: str, cfg: OrganizerConfig, progress=None,
+               control: RunControl | None = None) -> RunSummary:
+    """
+    Apply phase: run the moves of a JSONL plan file. With cfg.journal, plan
+    lines already recorded in the journal are skipped, so an interrupted
+    apply resumes where it stopped without rescanning anything. A planned
+    name that got taken in the meantime falls back to the next free name.
+    progress and control work as for organize().
+    """
+    done = DoneSet.from_journal(cfg.journal) if cfg.journal else DoneSet()
+    reporter = ProgressReporter(progress, None, control) if progress is not None else None
+    with RunContext(cfg, reporter, control) as ctx:
+        pending = ((n, move) for n, move in read_jsonl(plan_path) if n not in done)
+        if cfg.workers <= 1:
+            for n, move in pending:
+                if control is not None and not control.wait():
+                    break
+                _apply_planned(move, n, cfg, ctx)
+        else:
+            with DestinationLanes(cfg.workers) as lanes:
+                for n, move in pending:
+                    if control is not None and not control.wait():
+                        break
+                    lanes.submit(dirname(move["dst"]), _apply_planned, move, n, cfg, ctx)
+    return _finish_run(ctx)
 
 
-def setup_logging(level: str = "INFO") -> None:
+def undo(journal_path: str, dry_run: bool = False) -> int:
+    """
+    Move every file recorded in a journal back to where it came from. A file
+    that reappeared at the original path is kept and the returning file gets
+    a unique name next to it. Returns the number of files moved back.
+    """
+    indexes = DestinationIndexes()
+    restored = 0
+    for _, rec in read_jsonl(journal_path):
+        src, dst = rec["src"], rec["dst"]
+        entry = PathEntry(dst)
+        if not entry.is_file(follow_symlinks=False):
+            logging.warning("Moved file is gone, cannot undo: %s", dst)
+            continue
+        try:
+            back = safe_move_entry(entry, dirname(src), basename(src), dry_run, indexes.get(dirname(src)))
+        except Exception:
+            logging.exception("Failed to undo move: %s -> %s", src, dst)
+            continue
+        if not dry_run:
+            logging.info("Moved back: %s -> %s", dst, back)
+        restored += 1
+    return restored
+
+
+def setup_logging(level: str = "INFO", fmt: str = "text", summary: bool = False) -> None:
+    """
+    Log to stderr through a queue, so the organizer never waits on log I/O.
+    fmt is "text" or "jsonl"; summary=True aggregates per-file lines into
+    counts per destination and skip reason, written when logging stops.
+    Leaves handlers installed by someone else (e.g. the GUI) alone.
+    """
     lvl = getattr(logging, level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=lvl,
-        format="%(asctime)s %(levelname)s %(message)s"
-    )
+    root = logging.getLogger()
+    if root.handlers and not any(isinstance(h, LocalQueueHandler) for h in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "jsonl" else logging.Formatter(TEXT_FORMAT))
+    install_logging([handler], lvl, summary)
 
 
 def main() -> None:
     import argparse
 
     parser = argparse.ArgumentParser(description="Organize files by type and size safely.")
-    parser.add_argument("--source", required=True, help="Source directory to scan")
-    parser.add_argument("--music-dir", required=True, help="Destination for music files")
-    parser.add_argument("--sfx-dir", required=True, help="Destination for SFX/short audio files")
-    parser.add_argument("--video-dir", required=True, help="Destination for video files")
-    parser.add_argument("--image-dir", required=True, help="Destination for image files")
-    parser.add_argument("--docs-dir", required=True, help="Destination for document files")
+    # Source and destinations are required unless --apply, --undo or --manifest is given
+    parser.add_argument("--source", action="append", default=[],
+                        help="Source directory to scan (repeat to organize several sources in parallel processes)")
+    parser.add_argument("--music-dir", help="Destination for music files")
+    parser.add_argument("--sfx-dir", help="Destination for SFX/short audio files")
+    parser.add_argument("--video-dir", help="Destination for video files")
+    parser.add_argument("--image-dir", help="Destination for image files")
+    parser.add_argument("--docs-dir", help="Destination for document files")
     parser.add_argument("--sfx-size-mb", type=float, default=10.0, help="Size threshold in MB for routing audio to SFX")
-    parser.add_argument("--dry-run", action="store_true", help="Do not move files; only log actions")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Do not move files; write the move plan as JSONL to stdout (or to --plan)")
+    parser.add_argument("--plan", metavar="FILE", help="Write the move plan as JSONL to FILE without moving anything")
+    parser.add_argument("--apply", metavar="PLAN", help="Apply a plan written by --plan instead of scanning")
+    parser.add_argument("--journal", metavar="FILE",
+                        help="Record completed moves in FILE; with --apply, resume from it after an interruption")
+    parser.add_argument("--undo", metavar="JOURNAL", help="Move the files recorded in JOURNAL back where they came from")
     parser.add_argument("--log-level", default="INFO", help="Logging level: DEBUG, INFO, WARNING, ERROR")
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="text",
+                        help="Log as plain text or as JSON lines with structured fields (default: text)")
+    parser.add_argument("--log-summary", action="store_true",
+                        help="Instead of one line per file, log counts per destination and skip reason at the end")
+    parser.add_argument("--workers", type=int, default=1, help="Number of threads used to move files (default: 1)")
+    parser.add_argument("--recursive", action="store_true", help="Also organize files in subdirectories of the source")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum subdirectory depth for --recursive (0 = top level only)")
+    parser.add_argument("--include-dir", action="append", default=[], metavar="PATTERN",
+                        help="Only take files from subdirectories matching this glob (repeatable)")
+    parser.add_argument("--exclude-dir", action="append", default=[], metavar="PATTERN",
+                        help="Never descend into subdirectories matching this glob (repeatable)")
+    parser.add_argument("--dedupe", choices=DEDUPE_POLICIES, default=None,
+                        help="What to do with files whose content already exists in the destination")
+    parser.add_argument("--hash-cache", default=None,
+                        help="SQLite file caching content hashes for --dedupe (default: user cache dir)")
+    parser.add_argument("--rules", default=None,
+                        help="JSON or TOML file with custom routing rules, checked before the built-in ones")
+    parser.add_argument("--sniff", choices=SNIFF_MODES, default=None,
+                        help="Identify files by content: 'missing' for unknown/no extension, 'all' for every file")
+    parser.add_argument("--sniff-cache", default=None,
+                        help="SQLite file caching sniffed types for --sniff (default: user cache dir)")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="batch",
+                        help="When to fsync files copied across filesystems before removing the source")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="Write a run summary with per-phase timings (JSON for .json, else Prometheus text)")
+    parser.add_argument("--profile", metavar="FILE", help="Run under cProfile and dump the stats to FILE")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="JSON list of configs to organize in parallel processes (command-line options are the defaults)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes for --manifest or several --source (default: CPU count)")
+    parser.add_argument("--watch", action="store_true", help="Keep running and organize new files as they appear")
+    parser.add_argument("--settle", type=float, default=0.5,
+                        help="Seconds a new file must stay unchanged before it is moved in --watch mode")
+    parser.add_argument("--poll", action="store_true", help="Use mtime polling instead of inotify in --watch mode")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Polling interval in seconds for --poll")
 
     args = parser.parse_args()
-    setup_logging(args.log_level)
+    batch = bool(args.manifest) or len(args.source) > 1
+    if not (args.apply or args.undo or args.manifest):
+        for option in ("source", "music_dir", "sfx_dir", "video_dir", "image_dir", "docs_dir"):
+            if not getattr(args, option):
+                parser.error(f"--{option.replace('_', '-')} is required")
+    if batch and (args.apply or args.undo or args.watch or args.plan or args.profile):
+        parser.error("--manifest and several --source cannot be combined with --apply, --undo, --watch, --plan or --profile")
+    setup_logging(args.log_level, args.log_format, args.log_summary)
+
+    if args.undo:
+        restored = undo(args.undo, dry_run=args.dry_run)
+        logging.info("Moved %d files back", restored)
+        return
 
     cfg = OrganizerConfig(
-        source_dir=args.source,
-        dest_dir_music=args.music_dir,
-        dest_dir_sfx=args.sfx_dir,
-        dest_dir_video=args.video_dir,
-        dest_dir_image=args.image_dir,
-        dest_dir_documents=args.docs_dir,
+        source_dir=args.source[0] if args.source else "",
+        dest_dir_music=args.music_dir or "",
+        dest_dir_sfx=args.sfx_dir or "",
+        dest_dir_video=args.video_dir or "",
+        dest_dir_image=args.image_dir or "",
+        dest_dir_documents=args.docs_dir or "",
         sfx_size_threshold=int(args.sfx_size_mb * 1024 * 1024),
         dry_run=args.dry_run,
+        workers=args.workers,
+        recursive=args.recursive,
+        max_depth=args.max_depth,
+        include_dirs=tuple(args.include_dir),
+        exclude_dirs=tuple(args.exclude_dir),
+        dedupe=args.dedupe,
+        hash_cache=args.hash_cache or default_cache_path(),
+        rules=load_rules(args.rules) if args.rules else None,
+        sniff=args.sniff,
+        sniff_cache=args.sniff_cache or default_cache_path("signatures.sqlite"),
+        journal=args.journal,
+        fsync=args.fsync,
+        metrics=bool(args.metrics_file),
     )
 
-    organize(cfg)
+    if batch:
+        from desktop_cleaner_batch import load_manifest, organize_batch
+        if args.manifest:
+            configs = load_manifest(args.manifest, cfg)
+        else:
+            configs = [replace(cfg, source_dir=source) for source in args.source]
+        if cfg.journal:
+            # One journal per source, as each runs in its own process
+            configs = [c if c.journal != cfg.journal else replace(c, journal=f"{cfg.journal}.{i}")
+                       for i, c in enumerate(configs)]
+        report = organize_batch(configs, args.processes, args.log_level, args.log_format, args.log_summary)
+        total = report.total
+        logging.info("Batch done: %d sources (%d failed), %d seen, %d moved (%d bytes), %d duplicates, %d errors in %.1fs",
+                     len(configs), len(report.failed), total.files_seen, total.files_moved, total.bytes_moved,
+                     total.duplicates, total.errors, total.wall_seconds)
+        if args.metrics_file:
+            report.write(args.metrics_file)
+        if report.failed:
+            sys.exit(1)
+        return
+
+    def run() -> RunSummary | None:
+        if args.apply:
+            return apply_plan(args.apply, cfg)
+        if args.watch:
+            from desktop_cleaner_watch import watch
+            watch(cfg, settle=args.settle, poll_interval=args.poll_interval, force_poll=args.poll)
+            return None
+        if args.plan or args.dry_run:
+            if args.plan:
+                with open(args.plan, "w", encoding="utf-8") as out:
+                    count = write_plan(cfg, out)
+            else:
+                count = write_plan(cfg, sys.stdout)
+            logging.info("Planned %d moves", count)
+            return None
+        return organize(cfg)
+
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        summary = profiler.runcall(run)
+        profiler.dump_stats(args.profile)
+        logging.info("Profile written to %s (inspect with: python -m pstats %s)", args.profile, args.profile)
+    else:
+        summary = run()
+
+    if summary is not None:
+        logging.info("Done: %d seen, %d moved (%d bytes), %d duplicates, %d errors, skipped %s",
+                     summary.files_seen, summary.files_moved, summary.bytes_moved,
+                     summary.duplicates, summary.errors, summary.skipped or "none")
+        if args.metrics_file:
+            summary.write(args.metrics_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+from os import scandir
+
+# Bytes hashed at each end of a file for the cheap head/tail comparison
+EDGE_BYTES = 8 * 1024
+# Slice size used when feeding an mmap to the full-content hash
+FULL_HASH_CHUNK = 16 * 1024 * 1024
+# Cache rows written between commits
+CACHE_COMMIT_EVERY = 512
+
+DEDUPE_POLICIES = ("skip", "delete", "hardlink")
+
+
+def default_cache_path(name: str = "hashes.sqlite") -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "desktop_cleaner", name)
+
+
+def file_key(st: os.stat_result) -> tuple[int, int, int, int]:
+    """Cache key that changes whenever the file content can have changed."""
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _edge_hash(path: str, size: int) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(EDGE_BYTES))
+        if size > 2 * EDGE_BYTES:
+            f.seek(size - EDGE_BYTES)
+            h.update(f.read(EDGE_BYTES))
+        elif size > EDGE_BYTES:
+            h.update(f.read())
+    return h.digest()
+
+
+def _full_hash(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for start in range(0, len(view), FULL_HASH_CHUNK):
+                    h.update(view[start:start + FULL_HASH_CHUNK])
+            finally:
+                view.release()
+    return h.digest()
+
+
+class HashCache:
+    """
+    SQLite cache of head/tail and full-content hashes keyed by
+    (device, inode, size, mtime), so unchanged files are never read twice.
+    Pass ":memory:" for a cache that only lives as long as the run.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,"
+            " edge BLOB, full BLOB,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns))"
+        )
+        self._pending = 0
+
+    def _get(self, key, column: str) -> bytes | None:
+        row = self._db.execute(
+            f"SELECT {column} FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=?", key
+        ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, key, column: str, value: bytes) -> None:
+        self._db.execute("INSERT OR IGNORE INTO hashes (dev, ino, size, mtime_ns) VALUES (?, ?, ?, ?)", key)
+        self._db.execute(
+            f"UPDATE hashes SET {column}=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=?", (value, *key)
+        )
+        self._pending += 1
+        if self._pending >= CACHE_COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def _cached(self, path: str, st: os.stat_result, column: str, compute) -> bytes:
+        key = file_key(st)
+        with self._lock:
+            value = self._get(key, column)
+        if value is None:
+            value = compute()
+            with self._lock:
+                self._put(key, column, value)
+        return value
+
+    def edge_hash(self, path: str, st: os.stat_result) -> bytes:
+        return self._cached(path, st, "edge", lambda: _edge_hash(path, st.st_size))
+
+    def full_hash(self, path: str, st: os.stat_result) -> bytes:
+        return self._cached(path, st, "full", lambda: _full_hash(path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+class DuplicateFinder:
+    """
+    Find files whose content already exists in a destination directory.
+
+    Candidates are narrowed in stages and each stage only sees the survivors
+    of the previous one: same size, then same hash of the first and last few
+    KB, then same full-content hash. Destination directories are indexed by
+    size on first use; files moved in during the run are added as they land.
+    Empty files are never treated as duplicates.
+    """
+
+    def __init__(self, cache: HashCache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._by_dir: dict[str, dict[int, list[str]]] = {}
+
+    def _sizes(self, dest_dir: str) -> dict[int, list[str]]:
+        sizes = self._by_dir.get(dest_dir)
+        if sizes is None:
+            sizes = self._by_dir[dest_dir] = {}
+            try:
+                with scandir(dest_dir) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file(follow_symlinks=False):
+                                size = entry.stat(follow_symlinks=False).st_size
+                                if size:
+                                    sizes.setdefault(size, []).append(entry.path)
+                        except OSError:
+                            continue
+            except FileNotFoundError:
+                pass
+        return sizes
+
+    def find(self, path: str, st: os.stat_result, dest_dir: str) -> str | None:
+        """Return the path of a file in dest_dir with the same content, or None."""
+        if not st.st_size:
+            return None
+        with self._lock:
+            candidates = list(self._sizes(dest_dir).get(st.st_size, ()))
+        if not candidates:
+            return None
+
+        edge = self.cache.edge_hash(path, st)
+        full = None
+        for candidate in candidates:
+            try:
+                cst = os.stat(candidate, follow_symlinks=False)
+                if cst.st_size != st.st_size:
+                    continue
+                if (cst.st_dev, cst.st_ino) == (st.st_dev, st.st_ino):
+                    return candidate
+                if self.cache.edge_hash(candidate, cst) != edge:
+                    continue
+                if full is None:
+                    full = self.cache.full_hash(path, st)
+                if self.cache.full_hash(candidate, cst) == full:
+                    return candidate
+            except OSError:
+                # Candidate vanished or is unreadable; it cannot be a duplicate
+                logging.debug("Skipping duplicate candidate: %s", candidate)
+        return None
+
+    def add(self, path: str, size: int, dest_dir: str) -> None:
+        """Record a file that was just placed in dest_dir."""
+        if not size:
+            return
+        with self._lock:
+            self._sizes(dest_dir).setdefault(size, []).append(path)
+
+    def close(self) -> None:
+        self.cache.close()
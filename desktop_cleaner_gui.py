@@ -2,26 +2,62 @@ import logging
 import os
 import threading
 import tkinter as tk
+from collections import deque
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
-from desktop_cleaner_bot import OrganizerConfig, organize, setup_logging
+from desktop_cleaner_bot import OrganizerConfig, organize
+from desktop_cleaner_logging import TEXT_FORMAT, install as install_logging
+from desktop_cleaner_progress import RunControl
+
+# Lines kept in the log widget, and how often pending lines are rendered
+LOG_MAX_LINES = 5000
+LOG_FLUSH_MS = 100
 
 
 class TextHandler(logging.Handler):
-    """Custom logging handler to redirect logs to a text widget."""
+    """
+    Logging handler that renders records into a text widget in batches.
+
+    emit() only appends the formatted line to a bounded deque (safe from any
+    thread); a Tk timer drains it every interval_ms with a single insert,
+    then trims the widget to the last max_lines lines. A flood of records
+    therefore costs one widget update per tick, and old lines are dropped
+    instead of growing the widget without limit.
+    """
     
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, max_lines=LOG_MAX_LINES, interval_ms=LOG_FLUSH_MS):
         super().__init__()
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self._pending = deque(maxlen=max_lines)
     
     def emit(self, record):
-        msg = self.format(record)
-        def append():
-            self.text_widget.configure(state='normal')
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.configure(state='disabled')
-            self.text_widget.see(tk.END)
-        self.text_widget.after(0, append)
+        try:
+            self._pending.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+    
+    def start(self):
+        """Start the render timer; call from the Tk thread."""
+        self.text_widget.after(self.interval_ms, self._render)
+    
+    def _render(self):
+        lines = []
+        pending = self._pending
+        while pending:
+            lines.append(pending.popleft())
+        if lines:
+            widget = self.text_widget
+            widget.configure(state='normal')
+            widget.insert(tk.END, '\n'.join(lines) + '\n')
+            # The text always ends with an empty line after the last newline
+            excess = int(widget.index('end-1c').split('.')[0]) - 1 - self.max_lines
+            if excess > 0:
+                widget.delete('1.0', f'{excess + 1}.0')
+            widget.configure(state='disabled')
+            widget.see(tk.END)
+        self.text_widget.after(self.interval_ms, self._render)
 
 
 class DesktopCleanerGUI:
@@ -41,6 +77,9 @@ class DesktopCleanerGUI:
         self.sfx_size_mb = tk.DoubleVar(value=10.0)
         self.dry_run = tk.BooleanVar(value=True)
         self.log_level = tk.StringVar(value="INFO")
+        self.log_file = tk.StringVar()
+        self.file_handler = None
+        self.control = None
         
         self.setup_ui()
         self.setup_logging()
@@ -90,6 +129,14 @@ class DesktopCleanerGUI:
                                 state="readonly", width=10)
         log_combo.pack(side=tk.RIGHT)
         
+        # Optional log file (the full log; the widget keeps recent lines only)
+        log_file_frame = ttk.Frame(settings_frame)
+        log_file_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(log_file_frame, text="Log File (optional):").pack(side=tk.LEFT)
+        ttk.Button(log_file_frame, text="Browse", width=8,
+                   command=self.browse_log_file).pack(side=tk.RIGHT)
+        ttk.Entry(log_file_frame, textvariable=self.log_file, width=40).pack(side=tk.RIGHT, padx=(5, 5))
+        
         # Dry run checkbox
         dry_run_check = ttk.Checkbutton(settings_frame, text="Dry Run (Preview only - don't move files)", 
                                        variable=self.dry_run)
@@ -114,9 +161,19 @@ class DesktopCleanerGUI:
                                  command=self.load_defaults)
         defaults_btn.pack(side=tk.LEFT)
         
-        # Progress bar
+        # Cancel and pause buttons (only active while organizing)
+        self.cancel_btn = ttk.Button(button_frame, text="⏹ Cancel", 
+                                    command=self.cancel_organization, state='disabled')
+        self.cancel_btn.pack(side=tk.RIGHT)
+        self.pause_btn = ttk.Button(button_frame, text="⏸ Pause", 
+                                   command=self.toggle_pause, state='disabled')
+        self.pause_btn.pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # Progress bar and progress details
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.pack(fill=tk.X, pady=(0, 10))
+        self.progress.pack(fill=tk.X)
+        self.progress_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.progress_var).pack(anchor=tk.W, pady=(0, 10))
         
         # Log output frame
         log_frame = ttk.LabelFrame(main_frame, text="Log Output", padding=5)
@@ -148,6 +205,13 @@ class DesktopCleanerGUI:
                                command=lambda: self.browse_directory(var))
         browse_btn.pack(side=tk.RIGHT)
         
+    def browse_log_file(self):
+        """Open a dialog to choose the file the full log is written to."""
+        path = filedialog.asksaveasfilename(title="Select Log File", defaultextension=".log",
+                                            filetypes=[("Log files", "*.log"), ("All files", "*.*")])
+        if path:
+            self.log_file.set(path)
+            
     def browse_directory(self, var):
         """Open directory selection dialog."""
         directory = filedialog.askdirectory(title="Select Directory")
@@ -174,13 +238,30 @@ class DesktopCleanerGUI:
         # Clear any existing handlers
         logging.getLogger().handlers.clear()
         
-        # Create text handler
+        # Create text handler and start its render timer
         self.text_handler = TextHandler(self.log_text)
-        self.text_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
-        
-        # Add handler to root logger
-        logging.getLogger().addHandler(self.text_handler)
-        logging.getLogger().setLevel(logging.DEBUG)
+        self.text_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        self.text_handler.start()
+        self.apply_logging()
+        
+    def apply_logging(self):
+        """
+        Route logging through a queue to the text widget (and the log file,
+        if one is set) at the selected level, so organizing never waits on
+        formatting or file I/O.
+        """
+        level = getattr(logging, self.log_level.get().upper(), logging.INFO)
+        handlers = [self.text_handler]
+        old_file_handler = self.file_handler
+        self.file_handler = None
+        if self.log_file.get().strip():
+            self.file_handler = logging.FileHandler(self.log_file.get().strip(), encoding="utf-8")
+            self.file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(self.file_handler)
+        # Stops (and drains) the previous pipeline before the old file is closed
+        install_logging(handlers, level)
+        if old_file_handler is not None:
+            old_file_handler.close()
         
     def clear_log(self):
         """Clear the log text widget."""
@@ -226,9 +307,16 @@ class DesktopCleanerGUI:
         if not self.validate_inputs():
             return
             
-        # Disable the organize button
+        # Disable the organize button, enable pause/cancel
+        self.control = RunControl()
         self.organize_btn.configure(state='disabled')
+        self.pause_btn.configure(state='normal', text="⏸ Pause")
+        self.cancel_btn.configure(state='normal')
+        
+        # Indeterminate until the pre-count gives a total
+        self.progress.configure(mode='indeterminate', value=0)
         self.progress.start()
+        self.progress_var.set("Counting files...")
         self.status_var.set("Organizing files...")
         
         # Start organization in a separate thread
@@ -239,8 +327,8 @@ class DesktopCleanerGUI:
     def run_organization(self):
         """Run the organization process."""
         try:
-            # Update logging level
-            setup_logging(self.log_level.get())
+            # Update logging level and log file
+            self.apply_logging()
             
             # Create configuration
             config = OrganizerConfig(
@@ -266,10 +354,13 @@ class DesktopCleanerGUI:
             logging.info(f"Dry Run: {config.dry_run}")
             
             # Run organization
-            organize(config)
+            summary = organize(config, progress=self.report_progress, control=self.control, precount=True)
             
             # Show completion message
-            mode = "Preview completed" if config.dry_run else "Organization completed"
+            if summary.cancelled:
+                mode = "Preview cancelled" if config.dry_run else "Organization cancelled"
+            else:
+                mode = "Preview completed" if config.dry_run else "Organization completed"
             self.root.after(0, lambda: self.organization_completed(mode))
             
         except Exception as e:
@@ -277,17 +368,68 @@ class DesktopCleanerGUI:
             logging.error(error_msg)
             self.root.after(0, lambda: self.organization_error(error_msg))
             
-    def organization_completed(self, message):
-        """Called when organization is completed successfully."""
+    def report_progress(self, progress):
+        """Progress callback, called (throttled) from the organizer thread."""
+        self.root.after(0, lambda: self.show_progress(progress))
+        
+    def show_progress(self, progress):
+        """Update the progress bar and details from a Progress snapshot."""
+        if progress.files_total:
+            if str(self.progress['mode']) != 'determinate':
+                self.progress.stop()
+                self.progress.configure(mode='determinate')
+            self.progress.configure(maximum=progress.files_total, value=progress.files_done)
+            done = f"{progress.files_done}/{progress.files_total} files"
+        else:
+            done = f"{progress.files_done} files"
+        details = (f"{done} - {progress.bytes_moved / (1024 * 1024):.1f} MB moved - "
+                   f"{progress.files_per_second:.0f} files/s, {progress.bytes_per_second / (1024 * 1024):.1f} MB/s")
+        if progress.eta_seconds is not None and not progress.finished:
+            minutes, seconds = divmod(int(progress.eta_seconds), 60)
+            details += f" - ETA {minutes}:{seconds:02d}"
+        if self.control is not None and self.control.paused:
+            details += " (paused)"
+        self.progress_var.set(details)
+        
+    def toggle_pause(self):
+        """Pause or resume the running organization."""
+        if self.control is None:
+            return
+        if self.control.paused:
+            self.control.resume()
+            self.pause_btn.configure(text="⏸ Pause")
+            self.status_var.set("Organizing files...")
+        else:
+            self.control.pause()
+            self.pause_btn.configure(text="▶ Resume")
+            self.status_var.set("Paused")
+            
+    def cancel_organization(self):
+        """Stop the running organization after the entries in progress."""
+        if self.control is None:
+            return
+        self.control.cancel()
+        self.pause_btn.configure(state='disabled')
+        self.cancel_btn.configure(state='disabled')
+        self.status_var.set("Cancelling...")
+        
+    def finish_run(self):
+        """Reset the controls once a run is over."""
+        self.control = None
         self.progress.stop()
         self.organize_btn.configure(state='normal')
+        self.pause_btn.configure(state='disabled', text="⏸ Pause")
+        self.cancel_btn.configure(state='disabled')
+        
+    def organization_completed(self, message):
+        """Called when organization is completed successfully."""
+        self.finish_run()
         self.status_var.set(message)
         messagebox.showinfo("Success", message)
         
     def organization_error(self, error_msg):
         """Called when organization encounters an error."""
-        self.progress.stop()
-        self.organize_btn.configure(state='normal')
+        self.finish_run()
         self.status_var.set("Error occurred")
         messagebox.showerror("Error", error_msg)
 
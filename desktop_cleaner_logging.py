@@ -0,0 +1,168 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+LOG_FORMATS = ("text", "jsonl")
+
+# Structured fields the organizer attaches to per-file records via 'extra'
+EVENT_FIELDS = ("event", "dest", "reason", "src", "dst", "count", "bytes", "seconds", "method")
+
+# Per-file lines go through their own logger so they can be told apart
+FILE_LOG = logging.getLogger("desktop_cleaner.files")
+
+# Set while a summarizing LogPipeline runs; see file_event()
+_summary: "EventSummary | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including the event fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        doc = {"ts": round(record.created, 6), "level": record.levelname, "msg": record.getMessage()}
+        for key in EVENT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                doc[key] = value
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        return json.dumps(doc, ensure_ascii=False)
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Enqueue records untouched. The listener lives in this process, so there
+    is no need to format (and pickle-proof) records on the caller's thread:
+    logging a file costs one record and one queue put.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class EventSummary:
+    """Thread-safe counts of per-file events: (event, destination or reason) -> n."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def add(self, event: str, key: str | None) -> None:
+        with self._lock:
+            self._counts[event, key] += 1
+
+    def records(self) -> list[logging.LogRecord]:
+        """One INFO record per counted (event, key), ready for any handler."""
+        with self._lock:
+            counts = sorted(self._counts.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        records = []
+        for (event, key), n in counts:
+            if event == "skipped":
+                msg, fields = f"Summary: {n} files skipped ({key})", {"reason": key}
+            elif event == "duplicate":
+                msg, fields = f"Summary: {n} duplicates of files in {key}", {"dest": key}
+            else:
+                msg, fields = f"Summary: {n} files {event} to {key}", {"dest": key}
+            records.append(logging.makeLogRecord({
+                "name": FILE_LOG.name, "levelno": logging.INFO, "levelname": "INFO", "msg": msg,
+                "event": f"summary_{event}", "count": n, **fields,
+            }))
+        return records
+
+
+class LogPipeline:
+    """
+    Route root-logger records through an unbounded queue to 'handlers',
+    which run on a QueueListener thread: callers never block on log I/O.
+    With summary=True, per-file events are counted instead of logged and
+    the counts are written when the pipeline stops.
+    """
+
+    def __init__(self, handlers: list[logging.Handler], level: int = logging.INFO, summary: bool = False):
+        self.level = level
+        self.handlers = handlers
+        self.summary = EventSummary() if summary else None
+        self._queue = queue.SimpleQueue()
+        self._queue_handler = LocalQueueHandler(self._queue)
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._started = False
+
+    def start(self) -> "LogPipeline":
+        global _summary
+        root = logging.getLogger()
+        root.addHandler(self._queue_handler)
+        root.setLevel(self.level)
+        self._listener.start()
+        _summary = self.summary
+        self._started = True
+        return self
+
+    def stop(self) -> None:
+        """Drain the queue, write the summary (if any) and detach from the root logger."""
+        global _summary
+        if not self._started:
+            return
+        self._started = False
+        if _summary is self.summary:
+            _summary = None
+        logging.getLogger().removeHandler(self._queue_handler)
+        self._listener.stop()
+        records = self.summary.records() if self.summary is not None else []
+        for handler in self.handlers:
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            handler.flush()
+
+    def __enter__(self) -> "LogPipeline":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def file_event(level: int, msg: str, *args, event: str, **fields) -> None:
+    """
+    Log one per-file line with its structured fields, or, while a pipeline
+    is summarizing, just count it (by destination or skip reason) so the
+    hot path does not even build a LogRecord. Warnings are always logged.
+    """
+    summary = _summary
+    if summary is not None:
+        summary.add(event, fields.get("dest") or fields.get("reason"))
+        if level < logging.WARNING:
+            return
+    if FILE_LOG.isEnabledFor(level):
+        fields["event"] = event
+        FILE_LOG.log(level, msg, *args, extra=fields, stacklevel=2)
+
+
+_installed: LogPipeline | None = None
+_install_lock = threading.Lock()
+
+
+def install(handlers: list[logging.Handler], level: int = logging.INFO, summary: bool = False) -> LogPipeline:
+    """
+    Make a LogPipeline over 'handlers' the process-wide logging setup,
+    replacing the one installed before (if any). It is stopped at exit.
+    """
+    global _installed
+    with _install_lock:
+        if _installed is None:
+            atexit.register(uninstall)
+        else:
+            _installed.stop()
+        _installed = LogPipeline(handlers, level, summary).start()
+        return _installed
+
+
+def uninstall() -> None:
+    global _installed
+    with _install_lock:
+        if _installed is not None:
+            _installed.stop()
+            _installed = None
@@ -0,0 +1,144 @@
+import threading
+import time
+from dataclasses import dataclass
+
+# Minimum seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.2
+
+
+class RunControl:
+    """
+    Pause/resume/cancel token for a run, safe to drive from another thread
+    (e.g. a GUI). Workers call wait() between entries: it blocks while the
+    run is paused and returns False once it is cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = False
+        self._paused_at: float | None = None
+        self._paused_total = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def paused_seconds(self) -> float:
+        """Total time spent paused so far."""
+        with self._lock:
+            if self._paused_at is None:
+                return self._paused_total
+            return self._paused_total + time.monotonic() - self._paused_at
+
+    def pause(self) -> None:
+        with self._lock:
+            if self._paused_at is None and not self._cancelled:
+                self._paused_at = time.monotonic()
+                self._running.clear()
+
+    def resume(self) -> None:
+        with self._lock:
+            if self._paused_at is not None:
+                self._paused_total += time.monotonic() - self._paused_at
+                self._paused_at = None
+            self._running.set()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        # Wake up anyone waiting on a pause
+        self.resume()
+
+    def wait(self) -> bool:
+        """Block while paused; return False if the run has been cancelled."""
+        if not self._running.is_set():
+            self._running.wait()
+        return not self._cancelled
+
+
+@dataclass
+class Progress:
+    """Snapshot of a run's progress, as passed to progress callbacks."""
+    files_done: int
+    files_total: int | None
+    bytes_moved: int
+    elapsed: float
+    files_per_second: float
+    bytes_per_second: float
+    eta_seconds: float | None
+    finished: bool = False
+    cancelled: bool = False
+
+    @property
+    def fraction(self) -> float | None:
+        if not self.files_total:
+            return None
+        return min(self.files_done / self.files_total, 1.0)
+
+
+class ProgressReporter:
+    """
+    Count processed entries and moved bytes, and call callback(Progress) at
+    most once every 'interval' seconds (plus once more on finish()), so
+    reporting stays cheap however fast entries go by. Time spent paused is
+    left out of the rates and the ETA.
+    """
+
+    def __init__(self, callback, total: int | None = None, control: RunControl | None = None,
+                 interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.total = total
+        self.control = control
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._files = 0
+        self._bytes = 0
+        self._started = time.monotonic()
+        self._next = self._started + interval
+        # Pauses before this reporter started (e.g. during a pre-count) are not its own
+        self._paused_before = control.paused_seconds if control is not None else 0.0
+
+    def advance(self, nbytes: int = 0) -> None:
+        """Record one processed entry (moved, skipped or failed) and nbytes moved."""
+        with self._lock:
+            self._files += 1
+            self._bytes += nbytes
+            now = time.monotonic()
+            if now < self._next:
+                return
+            self._next = now + self.interval
+            snapshot = self._snapshot(now)
+        self.callback(snapshot)
+
+    def finish(self) -> Progress:
+        with self._lock:
+            snapshot = self._snapshot(time.monotonic(), finished=True)
+        self.callback(snapshot)
+        return snapshot
+
+    def _snapshot(self, now: float, finished: bool = False) -> Progress:
+        elapsed = now - self._started
+        paused = self.control.paused_seconds - self._paused_before if self.control is not None else 0.0
+        active = elapsed - paused
+        files_rate = self._files / active if active > 0 else 0.0
+        bytes_rate = self._bytes / active if active > 0 else 0.0
+        eta = None
+        if self.total is not None and files_rate > 0:
+            eta = max(self.total - self._files, 0) / files_rate
+        return Progress(
+            files_done=self._files,
+            files_total=self.total,
+            bytes_moved=self._bytes,
+            elapsed=elapsed,
+            files_per_second=files_rate,
+            bytes_per_second=bytes_rate,
+            eta_seconds=eta,
+            finished=finished,
+            cancelled=self.control is not None and self.control.cancelled,
+        )
@@ -0,0 +1,313 @@
+import json
+import re
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from fnmatch import translate
+from os.path import expanduser, splitext
+
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([kmgt]?i?b?)\s*$", re.IGNORECASE)
+_SIZE_UNITS = {
+    "": 1, "b": 1,
+    "k": 1000, "kb": 1000, "kib": 1024,
+    "m": 1000 ** 2, "mb": 1000 ** 2, "mib": 1024 ** 2,
+    "g": 1000 ** 3, "gb": 1000 ** 3, "gib": 1024 ** 3,
+    "t": 1000 ** 4, "tb": 1000 ** 4, "tib": 1024 ** 4,
+}
+_WILDCARDS = set("*?[]")
+DAY = 24 * 60 * 60
+
+
+def parse_size(value) -> int | None:
+    """Parse a size given as bytes (int) or a string like '10MB' or '1.5 GiB'."""
+    if value is None or isinstance(value, int):
+        return value
+    m = _SIZE_RE.match(str(value))
+    if not m or m.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(m.group(1)) * _SIZE_UNITS[m.group(2).lower()])
+
+
+@dataclass
+class Rule:
+    """
+    One routing rule. Every condition that is set must hold for the rule to
+    match; the first matching rule (in file order) decides the destination.
+    - extensions: lowercase extensions including the dot, e.g. (".png",)
+    - glob: case-insensitive fnmatch pattern on the file name
+    - regex: regular expression searched in the file name
+    - min_size / max_size: bytes (inclusive / exclusive)
+    - min_age_days / max_age_days: age from the modification time
+    """
+    dest: str
+    name: str = ""
+    extensions: tuple[str, ...] = ()
+    glob: str | None = None
+    regex: str | None = None
+    min_size: int | None = None
+    max_size: int | None = None
+    min_age_days: float | None = None
+    max_age_days: float | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict, index: int) -> "Rule":
+        data = dict(data)
+        if "dest" not in data:
+            raise ValueError(f"Rule #{index + 1} has no 'dest'")
+        ext = data.pop("ext", data.pop("extensions", ()))
+        if isinstance(ext, str):
+            ext = (ext,)
+        exts = tuple(e.lower() if e.startswith(".") else "." + e.lower() for e in ext)
+        unknown = set(data) - {f for f in cls.__dataclass_fields__ if f != "extensions"}
+        if unknown:
+            raise ValueError(f"Rule #{index + 1} has unknown keys: {', '.join(sorted(unknown))}")
+        rule = cls(extensions=exts, **data)
+        rule.dest = expanduser(rule.dest)
+        rule.name = rule.name or f"rule-{index + 1}"
+        rule.min_size = parse_size(rule.min_size)
+        rule.max_size = parse_size(rule.max_size)
+        return rule
+
+    def keys(self) -> tuple[str, ...]:
+        """
+        Extensions this rule can match, or () when it can match any extension
+        (it then goes to the fallback list).
+        """
+        if self.extensions:
+            return self.extensions
+        if self.glob:
+            ext = splitext(self.glob.lower())[1]
+            if ext and not _WILDCARDS & set(ext):
+                return (ext,)
+        return ()
+
+    def pattern(self) -> str | None:
+        """
+        The name conditions as one regex source usable with search(), or None
+        when the rule has no name condition.
+        """
+        parts = []
+        if self.glob:
+            parts.append(f"^(?i:{translate(self.glob)})")
+        if self.regex:
+            parts.append(f"(?:{self.regex})")
+        if not parts:
+            return None
+        # Both must hold: express the pair as a lookahead on the glob
+        return parts[0] if len(parts) == 1 else f"(?=^(?i:{translate(self.glob)}))(?s:.*?){parts[1]}"
+
+    def holds(self, size: int, age: float) -> bool:
+        """Whether the size and age conditions hold; age is in seconds since the last modification."""
+        return ((self.min_size is None or size >= self.min_size)
+                and (self.max_size is None or size < self.max_size)
+                and (self.min_age_days is None or age >= self.min_age_days * DAY)
+                and (self.max_age_days is None or age < self.max_age_days * DAY))
+
+    def compile(self):
+        """Return a predicate(name, name_lower, st) built from the set conditions only."""
+        checks = []
+        if self.glob:
+            match_glob = re.compile(translate(self.glob), re.IGNORECASE).match
+            checks.append(lambda name, name_lower, st: match_glob(name) is not None)
+        if self.regex:
+            search = re.compile(self.regex).search
+            checks.append(lambda name, name_lower, st: search(name) is not None)
+        if self.min_size is not None:
+            lo = self.min_size
+            checks.append(lambda name, name_lower, st: st.st_size >= lo)
+        if self.max_size is not None:
+            hi = self.max_size
+            checks.append(lambda name, name_lower, st: st.st_size < hi)
+        if self.min_age_days is not None:
+            min_age = self.min_age_days * DAY
+            checks.append(lambda name, name_lower, st: time.time() - st.st_mtime >= min_age)
+        if self.max_age_days is not None:
+            max_age = self.max_age_days * DAY
+            checks.append(lambda name, name_lower, st: time.time() - st.st_mtime < max_age)
+
+        if not checks:
+            return lambda name, name_lower, st: True
+        if len(checks) == 1:
+            return checks[0]
+        return lambda name, name_lower, st: all(check(name, name_lower, st) for check in checks)
+
+
+def _gate(patterns: list[str]):
+    """
+    One search() for several name conditions, each followed by its own
+    empty group, so match.lastindex tells which one was found (an empty
+    marker keeps the regex engine's fast paths, wrapping each pattern in a
+    group would not). None when they cannot be combined safely.
+    """
+    if not patterns:
+        return None
+    try:
+        combined = re.compile("|".join(f"(?:{p})()" for p in patterns))
+    except re.error:
+        # e.g. a user regex with global inline flags
+        return None
+    # A group in a user regex would shift the numbering (and could be
+    # back-referenced), so only gate group-free patterns
+    return combined.search if combined.groups == len(patterns) else None
+
+
+class _Slot:
+    """
+    The rules of one dispatch slot, in file order, split in two:
+    - rules without a name condition only depend on the size and age of a
+      file. Their thresholds cut both axes into ranges inside which each of
+      these rules holds or fails as a whole, so the first one that matches
+      is worked out once per (size range, age range) and remembered.
+    - rules with a name condition are grouped by it (each distinct glob and
+      regex once), and the conditions are searched together by one regex,
+      alternatives in file order. A search reports the earliest condition
+      found at the leftmost position; only conditions earlier in the file
+      can still win, and only further right, so searching on from there
+      finds every candidate without testing the conditions one by one.
+    """
+
+    def __init__(self, items: list):
+        ordered = sorted(items, key=lambda item: item[0])
+        self.plain = [(i, rule) for i, rule in ordered if rule.pattern() is None]
+        sizes, ages = set(), set()
+        for _, rule in self.plain:
+            sizes.update(b for b in (rule.min_size, rule.max_size) if b is not None)
+            ages.update(b * DAY for b in (rule.min_age_days, rule.max_age_days) if b is not None)
+        self.size_bounds = sorted(sizes)
+        self.age_bounds = sorted(ages)
+        self.needs_age = any(rule.min_age_days is not None or rule.max_age_days is not None
+                             for _, rule in ordered)
+        # (size range, age range) -> (index, dest) of the first plain rule that holds, or None
+        self.first_plain: dict[tuple[int, int], tuple[int, str] | None] = {}
+        groups: dict[tuple, tuple] = {}
+        for i, rule in ordered:
+            if rule.pattern() is not None:
+                key = (rule.glob, rule.regex)
+                if key not in groups:
+                    groups[key] = (Rule(dest=rule.dest, glob=rule.glob, regex=rule.regex).compile(), [])
+                groups[key][1].append((i, rule))
+        # (name predicate, its rules), in order of each group's first rule
+        self.named = list(groups.values())
+        self.gate = _gate([Rule(dest="", glob=glob, regex=regex).pattern() for glob, regex in groups])
+        self.empty = not ordered
+
+    def destination(self, name: str, name_lower: str, st) -> str | None:
+        size = st.st_size
+        age = time.time() - st.st_mtime if self.needs_age else 0.0
+        best = None
+        if self.plain:
+            key = (bisect_right(self.size_bounds, size), bisect_right(self.age_bounds, age))
+            try:
+                best = self.first_plain[key]
+            except KeyError:
+                best = self.first_plain[key] = next(
+                    ((i, rule.dest) for i, rule in self.plain if rule.holds(size, age)), None)
+        if not self.named:
+            return best[1] if best is not None else None
+
+        if self.gate is not None:
+            found = self.gate(name)
+            # Only conditions before 'limit' can still beat what was found
+            limit = len(self.named)
+            while found is not None:
+                k = found.lastindex - 1
+                if k < limit:
+                    limit = k
+                    rules = self.named[k][1]
+                    if best is None or rules[0][0] < best[0]:
+                        hit = self._first_holding(rules, size, age, best)
+                        if hit is best or hit[0] != rules[0][0]:
+                            # The condition's first rule failed on size or
+                            # age, so a condition hidden behind it at this
+                            # place may have an earlier rule: test them all
+                            return self._scan(name, name_lower, st, size, age, best)
+                        best = hit
+                    if limit == 0:
+                        break
+                found = self.gate(name, found.start() + 1)
+            return best[1] if best is not None else None
+        return self._scan(name, name_lower, st, size, age, best)
+
+    def _scan(self, name, name_lower, st, size, age, best):
+        # Test the name conditions one by one
+        for matches, rules in self.named:
+            if best is not None and rules[0][0] > best[0]:
+                break
+            if matches(name, name_lower, st):
+                best = self._first_holding(rules, size, age, best)
+        return best[1] if best is not None else None
+
+    @staticmethod
+    def _first_holding(rules, size, age, best):
+        # The first of 'rules' that holds if it comes before best, else best
+        for i, rule in rules:
+            if best is not None and i > best[0]:
+                break
+            if rule.holds(size, age):
+                return i, rule.dest
+        return best
+
+
+class RuleSet:
+    """
+    Rules compiled once into a dispatch table keyed by extension. Each table
+    slot holds, in file order, the rules for that extension merged with the
+    rules that do not depend on the extension, so routing a file only
+    looks at rules that can possibly match it; see _Slot for how a slot
+    avoids testing its rules one by one.
+    """
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        by_ext: dict[str, list] = {}
+        generic = []
+        for item in enumerate(rules):
+            keys = item[1].keys()
+            if not keys:
+                generic.append(item)
+            for ext in keys:
+                by_ext.setdefault(ext, []).append(item)
+        self._generic = _Slot(generic)
+        self._table = {ext: _Slot(items + generic) for ext, items in by_ext.items()}
+
+    def __getstate__(self):
+        # The compiled predicates are closures: pickle the rules only (e.g.
+        # for the spawn workers of desktop_cleaner_batch) and rebuild
+        return self.rules
+
+    def __setstate__(self, rules):
+        self.__init__(rules)
+
+    @property
+    def destinations(self) -> set[str]:
+        return {rule.dest for rule in self.rules}
+
+    @property
+    def has_fallback_rules(self) -> bool:
+        """True when some rule can match files regardless of their extension."""
+        return not self._generic.empty
+
+    def destination(self, name: str, name_lower: str, ext_lower: str, st) -> str | None:
+        """Return the destination of the first matching rule, or None."""
+        return self._table.get(ext_lower, self._generic).destination(name, name_lower, st)
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Load rules from a JSON or TOML file (chosen by extension). The file holds
+    a list of tables under "rules", e.g. in TOML:
+
+        [[rules]]
+        name = "screenshots"
+        glob = "screenshot*.png"
+        dest = "~/Pictures/Screenshots"
+    """
+    if path.lower().endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    items = data.get("rules", []) if isinstance(data, dict) else data
+    return RuleSet([Rule.from_dict(item, i) for i, item in enumerate(items)])
@@ -0,0 +1,209 @@
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from desktop_cleaner_dedupe import CACHE_COMMIT_EVERY, file_key
+
+# Bytes read from the start of a file for signature matching
+HEADER_BYTES = 512
+# Entries grouped per batch of header reads, and threads doing the reads
+SNIFF_BATCH = 256
+SNIFF_WORKERS = 16
+
+SNIFF_MODES = ("missing", "all")
+
+# (offset, magic, extension), checked in order; the first match wins.
+# Containers that need a closer look (RIFF, ISO-BMFF, zip, ...) are handled
+# in sniff_header() itself.
+SIGNATURES = [
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tif"),
+    (0, b"MM\x00*", ".tif"),
+    (0, b"8BPS", ".psd"),
+    (0, b"\x00\x00\x00\x0cjP  \r\n\x87\n", ".jp2"),
+    (0, b"%PDF-", ".pdf"),
+    (0, b"{\\rtf", ".rtf"),
+    (0, b"ID3", ".mp3"),
+    (0, b"fLaC", ".flac"),
+    (0, b"FLV\x01", ".flv"),
+]
+
+_RIFF_TYPES = {b"WEBP": ".webp", b"WAVE": ".wav", b"AVI ": ".avi"}
+# ISO-BMFF major brands; any other brand (e.g. Canon CR3's "crx ") is not
+# assumed to be a video
+_FTYP_BRANDS = {
+    b"heic": ".heic", b"heix": ".heic", b"heim": ".heic", b"heis": ".heic", b"hevc": ".heic",
+    b"hevx": ".heic", b"hevm": ".heic", b"hevs": ".heic", b"mif1": ".heif", b"msf1": ".heif",
+    b"avif": ".avif", b"avis": ".avif", b"crx ": ".cr3",
+    b"M4A ": ".m4a", b"M4B ": ".m4a", b"M4V ": ".m4v", b"M4VH": ".m4v", b"M4VP": ".m4v", b"qt  ": ".mov",
+    b"isom": ".mp4", b"iso2": ".mp4", b"iso3": ".mp4", b"iso4": ".mp4", b"iso5": ".mp4",
+    b"iso6": ".mp4", b"mp41": ".mp4", b"mp42": ".mp4", b"mp71": ".mp4", b"avc1": ".mp4",
+    b"dash": ".mp4", b"mmp4": ".mp4", b"MSNV": ".mp4", b"f4v ": ".mp4", b"XAVC": ".mp4",
+}
+_OLE2 = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_ASF = b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"
+_EBML = b"\x1a\x45\xdf\xa3"
+_ODF_TYPES = {b"application/vnd.oasis.opendocument.text": ".odt"}
+_OOXML_PARTS = ((b"word/", ".docx"), (b"xl/", ".xlsx"), (b"ppt/", ".pptx"))
+_BMP_DIB_SIZES = {12, 40, 52, 56, 108, 124}
+
+
+def sniff_header(header: bytes, declared_ext: str = "") -> str | None:
+    """
+    Return the extension matching the file's magic signature, or None when
+    the content is not recognized. For ambiguous containers (OLE2, ASF, zip)
+    a declared extension of the same family is kept.
+    """
+    for offset, magic, ext in SIGNATURES:
+        if header.startswith(magic, offset):
+            return ext
+
+    if header.startswith(b"RIFF") and header[8:12] in _RIFF_TYPES:
+        return _RIFF_TYPES[header[8:12]]
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand.startswith(b"3g"):
+            return ".3gp"
+        return _FTYP_BRANDS.get(brand)
+    if header.startswith(_EBML):
+        return ".webm" if b"webm" in header[:64] else ".mkv"
+    if header.startswith(_ASF):
+        return declared_ext if declared_ext in (".wma", ".wmv") else ".wmv"
+    if header.startswith(_OLE2):
+        return declared_ext if declared_ext in (".doc", ".xls", ".ppt") else ".doc"
+    if header.startswith(b"PK\x03\x04"):
+        if header[30:38] == b"mimetype":
+            for mime, ext in _ODF_TYPES.items():
+                if header[38:].startswith(mime):
+                    return ext
+            return None
+        if declared_ext in (".docx", ".xlsx", ".pptx") and b"[Content_Types].xml" in header:
+            return declared_ext
+        for part, ext in _OOXML_PARTS:
+            if part in header:
+                return ext
+        return None
+
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        # MPEG audio frame sync: layer III is mp3, layer bits 00 is ADTS AAC
+        layer = (header[1] >> 1) & 0x03
+        if layer == 0x01:
+            return ".mp3"
+        if layer == 0x00:
+            return ".aac"
+    # MPEG transport stream: a 0x47 sync byte every 188 bytes; three of them,
+    # since text starting with 'G' can have another one 188 bytes on
+    if len(header) > 376 and header[0] == header[188] == header[376] == 0x47:
+        return ".ts"
+    if header.startswith(b"BM") and len(header) >= 18 and int.from_bytes(header[14:18], "little") in _BMP_DIB_SIZES:
+        return ".bmp"
+    if header.startswith(b"\x00\x00\x01\x00") and len(header) >= 6 and header[4:6] != b"\x00\x00":
+        return ".ico"
+    text = header.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return ".svg"
+    if text.startswith(b"<?xml"):
+        return ".xml"
+    return None
+
+
+def read_header(path: str, size: int = HEADER_BYTES) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(size)
+
+
+class SignatureCache:
+    """
+    SQLite cache of sniffed extensions keyed by (device, inode, size, mtime),
+    so repeated runs and watch mode never re-read a file's header.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, ext TEXT,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns))"
+        )
+        self._pending = 0
+
+    def get(self, key) -> str | None:
+        """Return the cached extension ('' = not recognized) or None on a miss."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ext FROM signatures WHERE dev=? AND ino=? AND size=? AND mtime_ns=?", key
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, rows) -> None:
+        """Store (key, ext) pairs; ext is '' for unrecognized content."""
+        rows = [(*key, ext) for key, ext in rows]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?, ?)", rows)
+            self._pending += len(rows)
+            if self._pending >= CACHE_COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+class Sniffer:
+    """
+    Identify files by content. Cache misses in a batch have their headers
+    read in parallel on a small thread pool.
+    """
+
+    def __init__(self, cache: SignatureCache, workers: int = SNIFF_WORKERS):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cleaner-sniff")
+
+    def sniff_many(self, entries) -> dict[str, str | None]:
+        """Return {entry.path: sniffed extension or None} for the given entries."""
+        result: dict[str, str | None] = {}
+        misses = []
+        for entry in entries:
+            try:
+                key = file_key(entry.stat(follow_symlinks=False))
+            except OSError:
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                misses.append((entry, key))
+            else:
+                result[entry.path] = cached or None
+
+        def sniff(item):
+            entry, key = item
+            try:
+                header = read_header(entry.path)
+            except OSError as e:
+                logging.debug("Cannot read header of %s: %s", entry.path, e)
+                return entry, key, None, False
+            declared_ext = os.path.splitext(entry.name)[1].lower()
+            return entry, key, sniff_header(header, declared_ext), True
+
+        stored = []
+        for entry, key, ext, ok in self._pool.map(sniff, misses):
+            result[entry.path] = ext
+            if ok:
+                stored.append((key, ext or ""))
+        self.cache.put_many(stored)
+        return result
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        self.cache.close()
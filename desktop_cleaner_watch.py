@@ -0,0 +1,335 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from os import scandir
+from os.path import abspath, join, normcase, relpath
+
+from desktop_cleaner_bot import (
+    OrganizerConfig,
+    PathEntry,
+    RunContext,
+    destination_dirs,
+    dir_matches,
+    iter_entries,
+    move_entry,
+    organize,
+    route_entry,
+)
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# A file is organized once it has been quiet for DEFAULT_SETTLE seconds after
+# being closed or moved in. Files that are still open for writing (no close
+# event seen yet) must stay quiet for DEFAULT_QUIET seconds instead.
+DEFAULT_SETTLE = 0.5
+DEFAULT_QUIET = 5.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class Inotify:
+    """Thin ctypes wrapper around the Linux inotify API."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("libc does not provide inotify")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.paths: dict[int, str] = {}
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.paths[wd] = path
+        return wd
+
+    def read_events(self):
+        """Yield (directory, mask, name) for every pending event."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            yield self.paths.get(wd), mask, name
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Debouncer:
+    """
+    Track files that changed recently and release them once they are quiet,
+    so half-written files are never handed to the mover.
+    """
+
+    def __init__(self, settle: float = DEFAULT_SETTLE, quiet: float = DEFAULT_QUIET):
+        self.settle = settle
+        self.quiet = quiet
+        self._due: dict[str, float] = {}
+        # Pending files already closed by their writer: later events (e.g.
+        # IN_ATTRIB from chmod or a metadata copy) only restart the settle time
+        self._closed: set[str] = set()
+
+    def touch(self, path: str, finished: bool, now: float | None = None) -> None:
+        """Record activity on path; finished=True when the writer closed it."""
+        now = time.monotonic() if now is None else now
+        if finished:
+            self._closed.add(path)
+        self._due[path] = now + (self.settle if path in self._closed else self.quiet)
+
+    def touch_existing(self, entry, now: float | None = None) -> None:
+        """
+        Record a file found by a directory scan rather than an event. It
+        counts as finished when it was last modified at least settle seconds
+        ago, i.e. it is no longer being written.
+        """
+        try:
+            mtime = entry.stat(follow_symlinks=False).st_mtime
+        except OSError:
+            return
+        self.touch(entry.path, finished=time.time() - mtime >= self.settle, now=now)
+
+    def pop_ready(self, now: float | None = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+        ready = [p for p, due in self._due.items() if due <= now]
+        for p in ready:
+            del self._due[p]
+            self._closed.discard(p)
+        return ready
+
+    def timeout(self, now: float | None = None) -> float | None:
+        """Seconds until the next file is due, or None when nothing is pending."""
+        if not self._due:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self._due.values()) - now)
+
+
+def _organize_path(path: str, cfg: OrganizerConfig, ctx: RunContext) -> None:
+    entry = PathEntry(path)
+    try:
+        sniffed = ctx.sniff([entry], cfg) if ctx.sniffer is not None else {}
+        dest_dir = route_entry(entry, cfg, sniffed.get(path))
+    except Exception:
+        logging.exception("Failed processing entry: %s", path)
+        return
+    if dest_dir:
+        move_entry(entry, dest_dir, cfg, ctx)
+
+
+def _subdir_included(cfg: OrganizerConfig, path: str, name: str, included: bool,
+                     dest_paths: set[str]) -> bool | None:
+    """
+    Whether files in the subdirectory 'path' of a directory are organized,
+    decided as iter_entries() does from cfg.include_dirs; None when the
+    subdirectory is not entered at all (excluded, or a destination).
+    """
+    if normcase(abspath(path)) in dest_paths:
+        return None
+    rel_path = relpath(path, cfg.source_dir).replace(os.sep, "/")
+    if cfg.exclude_dirs and dir_matches(cfg.exclude_dirs, name, rel_path):
+        return None
+    return included or dir_matches(cfg.include_dirs, name, rel_path)
+
+
+def _iter_watch_dirs(cfg: OrganizerConfig, path: str, depth: int, included: bool, dest_paths: set[str]):
+    """
+    Yield (directory, depth, included) for path and, in recursive mode, every
+    subdirectory iter_entries() would descend into.
+    """
+    yield path, depth, included
+    if not cfg.recursive or (cfg.max_depth is not None and depth >= cfg.max_depth):
+        return
+    try:
+        with scandir(path) as entries:
+            subdirs = [e for e in entries if e.is_dir(follow_symlinks=False)]
+    except OSError as e:
+        logging.warning("Cannot watch directory, skipping: %s (%s)", path, e)
+        return
+    for entry in subdirs:
+        child_included = _subdir_included(cfg, entry.path, entry.name, included, dest_paths)
+        if child_included is not None:
+            yield from _iter_watch_dirs(cfg, entry.path, depth + 1, child_included, dest_paths)
+
+
+def _touch_all(cfg: OrganizerConfig, debouncer: Debouncer) -> None:
+    """Queue every file currently in the source tree (after an inotify overflow)."""
+    for entry in iter_entries(cfg):
+        if entry.is_file(follow_symlinks=False):
+            debouncer.touch_existing(entry)
+
+
+def watch_inotify(cfg: OrganizerConfig, settle: float = DEFAULT_SETTLE, quiet: float = DEFAULT_QUIET,
+                  stop: threading.Event | None = None) -> None:
+    """
+    Organize files as inotify reports them. Blocks in select() while nothing
+    is pending, so an idle watcher uses no CPU.
+    """
+    inotify = Inotify()
+    debouncer = Debouncer(settle, quiet)
+    ctx = RunContext(cfg)
+    dest_paths = {normcase(abspath(d)) for d in destination_dirs(cfg)}
+    # Watched directory -> (depth, whether its files are organized); top-level
+    # files are always organized, deeper ones only below cfg.include_dirs
+    watched: dict[str, tuple[int, bool]] = {}
+
+    def add_tree(path: str, depth: int, included: bool) -> None:
+        for dir_path, dir_depth, dir_included in _iter_watch_dirs(cfg, path, depth, included, dest_paths):
+            try:
+                inotify.add_watch(dir_path)
+            except OSError as e:
+                logging.warning("Cannot watch directory, skipping: %s (%s)", dir_path, e)
+                continue
+            watched[dir_path] = (dir_depth, dir_included)
+            if dir_depth > 0 and dir_included:
+                # Files may have landed before the watch was in place
+                try:
+                    with scandir(dir_path) as entries:
+                        for entry in entries:
+                            if entry.is_file(follow_symlinks=False):
+                                debouncer.touch_existing(entry)
+                except OSError:
+                    pass
+
+    try:
+        add_tree(cfg.source_dir, 0, not cfg.include_dirs)
+        logging.info("Watching %s (inotify)", cfg.source_dir)
+        while stop is None or not stop.is_set():
+            timeout = debouncer.timeout()
+            if stop is not None:
+                timeout = 1.0 if timeout is None else min(timeout, 1.0)
+            readable, _, _ = select.select([inotify.fd], [], [], timeout)
+            if readable:
+                for dir_path, mask, name in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        logging.warning("inotify queue overflowed, rescanning %s", cfg.source_dir)
+                        _touch_all(cfg, debouncer)
+                        continue
+                    if dir_path is None:
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        if dir_path == cfg.source_dir:
+                            logging.error("Source directory went away, stopping watch: %s", dir_path)
+                            return
+                        continue
+                    path = join(dir_path, name)
+                    depth, included = watched.get(dir_path, (0, True))
+                    if mask & IN_ISDIR:
+                        if (mask & (IN_CREATE | IN_MOVED_TO) and cfg.recursive
+                                and (cfg.max_depth is None or depth < cfg.max_depth)):
+                            child_included = _subdir_included(cfg, path, name, included, dest_paths)
+                            if child_included is not None:
+                                add_tree(path, depth + 1, child_included)
+                        continue
+                    if depth > 0 and not included:
+                        continue
+                    debouncer.touch(path, finished=bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO)))
+            ready = debouncer.pop_ready()
+            for path in ready:
+                _organize_path(path, cfg, ctx)
+            if ready:
+                # Finish cross-device moves now so sources do not linger
+                ctx.copier.flush()
+    finally:
+        inotify.close()
+        ctx.close()
+
+
+def watch_poll(cfg: OrganizerConfig, settle: float = DEFAULT_SETTLE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+               stop: threading.Event | None = None) -> None:
+    """
+    Portable fallback: rescan the source every poll_interval seconds and
+    organize files whose size and mtime did not change for at least settle
+    seconds.
+    """
+    ctx = RunContext(cfg)
+    # path -> ((size, mtime_ns), first time this signature was seen)
+    seen: dict[str, tuple[tuple[int, int], float]] = {}
+    logging.info("Watching %s (polling every %.1fs)", cfg.source_dir, poll_interval)
+    try:
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            current = {}
+            for entry in iter_entries(cfg):
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                sig = (st.st_size, st.st_mtime_ns)
+                prev = seen.get(entry.path)
+                if prev is None or prev[0] != sig:
+                    current[entry.path] = (sig, now)
+                elif now - prev[1] >= settle:
+                    _organize_path(entry.path, cfg, ctx)
+                else:
+                    current[entry.path] = prev
+            seen = current
+            # Finish cross-device moves before the next scan sees their sources
+            ctx.copier.flush()
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    finally:
+        ctx.close()
+
+
+def watch(cfg: OrganizerConfig, settle: float = DEFAULT_SETTLE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+          force_poll: bool = False, stop: threading.Event | None = None) -> None:
+    """
+    Organize the source once, then keep running and organize new or finished
+    files as they appear. Uses inotify when available and falls back to mtime
+    polling otherwise. Runs until interrupted or until 'stop' is set.
+    """
+    organize(cfg)
+    try:
+        if not force_poll:
+            try:
+                watch_inotify(cfg, settle=settle, stop=stop)
+                return
+            except OSError as e:
+                logging.info("inotify unavailable (%s), falling back to polling", e)
+        watch_poll(cfg, settle=settle, poll_interval=poll_interval, stop=stop)
+    except KeyboardInterrupt:
+        logging.info("Watch stopped")
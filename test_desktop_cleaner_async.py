@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from desktop_cleaner_bot import OrganizerConfig, RunContext, organize_async
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 60
+
+
+class CancelMidScanTest(unittest.TestCase):
+    """Cancelling organize_async() while a scan batch runs in a worker thread."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "src")
+        os.makedirs(self.src)
+        # Wrong extensions, so every file goes through the sniffer
+        for i in range(3000):
+            with open(os.path.join(self.src, f"file{i}.dat"), "wb") as f:
+                f.write(JPEG)
+
+    def config(self, run: int) -> OrganizerConfig:
+        dest = os.path.join(self.tmp.name, "dest")
+        return OrganizerConfig(
+            source_dir=self.src,
+            dest_dir_music=os.path.join(dest, "music"),
+            dest_dir_sfx=os.path.join(dest, "sfx"),
+            dest_dir_video=os.path.join(dest, "video"),
+            dest_dir_image=os.path.join(dest, "image"),
+            dest_dir_documents=os.path.join(dest, "documents"),
+            sniff="all",
+            sniff_cache=os.path.join(self.tmp.name, f"sniff{run}.db"),
+            journal=os.path.join(self.tmp.name, f"journal{run}.jsonl"),
+        )
+
+    def test_cancel_mid_scan(self):
+        opened, closed = [], []
+        init, close = RunContext.__init__, RunContext.close
+
+        def record_init(ctx, *args, **kwargs):
+            init(ctx, *args, **kwargs)
+            opened.append(ctx)
+
+        def record_close(ctx):
+            closed.append(ctx)
+            close(ctx)
+
+        async def run(cfg: OrganizerConfig, delay: float) -> None:
+            task = asyncio.create_task(organize_async(cfg))
+            # Cancel once the scan is sniffing headers in its worker thread
+            while not any(t.name.startswith("cleaner-sniff") for t in threading.enumerate()):
+                await asyncio.sleep(0.0005)
+            await asyncio.sleep(delay)
+            task.cancel()
+            await task
+
+        with mock.patch.object(RunContext, "__init__", record_init), \
+                mock.patch.object(RunContext, "close", record_close):
+            for run_number in range(10):
+                with self.subTest(run=run_number):
+                    with self.assertRaises(asyncio.CancelledError):
+                        asyncio.run(run(self.config(run_number), 0.001 * run_number))
+                    self.assertEqual(closed, opened)
+                    sniffers = [t for t in threading.enumerate() if t.name.startswith("cleaner-sniff")]
+                    self.assertEqual(sniffers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from desktop_cleaner_sniff import sniff_header
+
+
+def transport_stream(packets: int) -> bytes:
+    return b"".join(b"\x47" + bytes([0x40, 0x00, 0x10]) + b"\xff" * 184 for _ in range(packets))
+
+
+class TransportStreamTest(unittest.TestCase):
+
+    def test_transport_stream(self):
+        self.assertEqual(sniff_header(transport_stream(3)), ".ts")
+
+    def test_text_with_g_at_sync_offsets_is_not_a_stream(self):
+        # 'G' at bytes 0 and 188, as in a text file starting with "Good ..."
+        text = bytearray(b"Good morning, this is a plain text note. " * 12)
+        text[188] = ord("G")
+        self.assertEqual(text[0], 0x47)
+        self.assertIsNone(sniff_header(bytes(text[:512])))
+
+    def test_short_header_is_not_a_stream(self):
+        self.assertIsNone(sniff_header(transport_stream(2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
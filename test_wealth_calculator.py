@@ -0,0 +1,24 @@
+import unittest
+
+from wealth_calculator import project_wealth, wealth_after
+
+
+class NegativeYearsTest(unittest.TestCase):
+
+    def test_wealth_after_rejects_negative_years(self):
+        for rate in (0, 5):
+            with self.assertRaises(ValueError):
+                wealth_after(1000, rate, 100, -3)
+
+    def test_project_wealth_rejects_negative_years(self):
+        with self.assertRaises(ValueError):
+            project_wealth(1000, 5, 100, -3, by_year=True)
+
+    def test_zero_years_is_current_wealth(self):
+        projection = project_wealth(1000, 5, 100, 0, by_year=True)
+        self.assertEqual(projection.final_wealth, 1000)
+        self.assertEqual(projection.by_year, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,25 +1,133 @@
+import math
 import sys
+from dataclasses import dataclass
+
+# Wealth grows by the rate of return once a year, then the year's savings
+# (12 x monthly) are added. That is a geometric series, so the wealth after
+# n years has a closed form and "years until the target" is a logarithm:
+# no year-by-year loop, and no endless loop when the target is out of reach.
+
+
+@dataclass
+class Projection:
+    """Wealth at the end of a projection, and at the end of each year if asked."""
+    years: int
+    final_wealth: float
+    by_year: list[float] | None = None
+
+
+@dataclass
+class FreedomResult:
+    """When the target is passed, or why it never will be."""
+    reachable: bool
+    years: int | None = None
+    # Wealth at the end of that year
+    wealth: float | None = None
+    # What wealth levels off at, when it does (negative rate of return)
+    limit: float | None = None
+    reason: str | None = None
+
+
+def _rate(rate_of_return):
+    rate = rate_of_return / 100
+    if rate <= -1:
+        raise ValueError("The rate of return must be above -100%")
+    return rate
+
+
+def wealth_after(current_wealth, rate_of_return, monthly_savings, years):
+    """
+    Wealth after 'years' years: current_wealth * g^n plus the savings
+    annuity savings * (g^n - 1) / r, with r the yearly rate and g = 1 + r.
+    """
+    if years < 0:
+        raise ValueError("The number of years cannot be negative")
+    rate = _rate(rate_of_return)
+    savings = monthly_savings * 12
+    if rate == 0:
+        return current_wealth + savings * years
+    # log1p/expm1 keep (g^n - 1) / r accurate for rates close to 0
+    log_growth = years * math.log1p(rate)
+    try:
+        growth = math.exp(log_growth)
+    except OverflowError:
+        level = current_wealth + savings / rate
+        return math.copysign(math.inf, level) if level else current_wealth
+    return current_wealth * growth + savings * (math.expm1(log_growth) / rate)
+
+
+def project_wealth(current_wealth, rate_of_return, monthly_savings, years, by_year=False):
+    """Wealth after 'years' years; by_year=True also lists the wealth at the end of each year."""
+    final_wealth = wealth_after(current_wealth, rate_of_return, monthly_savings, years)
+    history = None
+    if by_year:
+        history = [wealth_after(current_wealth, rate_of_return, monthly_savings, year)
+                   for year in range(1, years + 1)]
+    return Projection(years, final_wealth, history)
+
+
+def years_till_freedom(current_wealth, rate_of_return, monthly_savings, target_wealth):
+    """
+    First year at whose end wealth is above target_wealth (counting from
+    year 1, like the year-by-year calculation). Targets that can never be
+    reached are detected up front: wealth that does not grow, or that levels
+    off below the target.
+    """
+    rate = _rate(rate_of_return)
+    savings = monthly_savings * 12
+
+    def wealth(years):
+        return wealth_after(current_wealth, rate_of_return, monthly_savings, years)
+
+    first = wealth(1)
+    if first > target_wealth:
+        return FreedomResult(True, 1, first)
+
+    # Each year's change is the first one's times (1 + rate): wealth only
+    # ever rises if the first year's change is positive
+    change = current_wealth * rate + savings
+    if change <= 0:
+        return FreedomResult(False, reason="your wealth does not grow: save more or get a higher return")
+    limit = None
+    if rate < 0:
+        limit = -savings / rate
+        if limit <= target_wealth:
+            return FreedomResult(False, limit=limit, reason=f"your wealth levels off at {limit:.2f}")
+
+    # Solve wealth(n) = target for n, then settle the rounding on the
+    # neighbouring years
+    if rate == 0:
+        estimate = (target_wealth - current_wealth) / savings
+    else:
+        level = savings / rate
+        estimate = math.log((target_wealth + level) / (current_wealth + level)) / math.log1p(rate)
+    if not math.isfinite(estimate):
+        return FreedomResult(False, limit=limit, reason="the target is too far away to compute")
+    years = max(math.floor(estimate) + 1, 1)
+    for _ in range(4):
+        if years > 1 and wealth(years - 1) > target_wealth:
+            years -= 1
+        elif wealth(years) <= target_wealth:
+            years += 1
+        else:
+            return FreedomResult(True, years, wealth(years), limit)
+    return FreedomResult(False, limit=limit, reason="the target is too close to where your wealth levels off")
 
 
 def calculate_wealth_by_year(current_wealth, rate_of_return, monthly_savings, years):
-    total_savings = current_wealth
-    for year in range(1, years + 1):
-        interest = total_savings * (rate_of_return / 100)
-        total_savings += interest + (monthly_savings * 12)
+    projection = project_wealth(current_wealth, rate_of_return, monthly_savings, years, by_year=True)
+    for year, total_savings in enumerate(projection.by_year, 1):
         print(f"Year {year}: Total wealth = {total_savings:.2f}")
-    return 0
+    return projection
 
 
 def calculate_years_till_freedom(current_wealth, rate_of_return, monthly_savings, target_wealth):
-    total_savings = current_wealth
-    years_to_freedom = 0
-    while True:
-        years_to_freedom += 1
-        interest = total_savings * (rate_of_return / 100)
-        total_savings += interest + (monthly_savings * 12)
-        if total_savings > target_wealth:
-            print(f"You will reach financial freedom in {years_to_freedom} years! Keep grinding!! ")
-            return 0
+    result = years_till_freedom(current_wealth, rate_of_return, monthly_savings, target_wealth)
+    if result.reachable:
+        print(f"You will reach financial freedom in {result.years} years! Keep grinding!! ")
+    else:
+        print(f"You will never reach {target_wealth:.2f}: {result.reason}.")
+    return result
 
 
 def main():
@@ -31,6 +139,9 @@ def main():
     except ValueError:
         print("Invalid input. You must only enter numbers, dumbass!! ")
         sys.exit()
+    if rate_of_return <= -100:
+        print("Invalid input. The rate of return must be above -100%")
+        sys.exit()
     if prog == 'returns':
         years = int(input("Enter investment period in years: "))
         calculate_wealth_by_year(current_wealth, rate_of_return, monthly_savings, years)